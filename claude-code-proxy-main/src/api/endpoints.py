@@ -1,18 +1,42 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import APIRouter, HTTPException, Request, Header, Depends
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.exceptions import RequestValidationError
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse, Response
+from starlette.background import BackgroundTask
 from datetime import datetime
-import uuid
+import os
 import json
+import time
+import traceback
+import orjson
+from functools import lru_cache
 from typing import Optional
+from pydantic import ValidationError
 
+try:
+    import tiktoken
+except ImportError:  # optional: count_tokens falls back to a character estimate
+    tiktoken = None
+
+from src.api.responses import ORJSONResponse
 from src.core.config import config
 from src.core.logging import logger
 from src.core.client import OpenAIClient
-from src.models.claude import ClaudeMessagesRequest, ClaudeTokenCountRequest
+from src.core.response_cache import ResponseCache
+from src.core.request_coalescer import RequestCoalescer
+from src.models.claude import (
+    ClaudeMessagesRequest,
+    ClaudeTokenCountRequest,
+    ClaudeContentBlockText,
+    ClaudeSystemContent,
+)
 from src.conversion.request_converter import convert_claude_to_openai
 from src.conversion.response_converter import (
     convert_openai_to_claude_response,
     convert_openai_streaming_to_claude_with_cancellation,
+    batch_sse_events,
 )
 from src.core.model_manager import model_manager
 
@@ -29,22 +53,73 @@ openai_client = OpenAIClient(
     custom_headers=custom_headers,
     api_provider=config.api_provider,
     lmp_api_version=config.lmp_api_version,
+    max_connections=config.max_connections,
+    max_keepalive_connections=config.max_keepalive_connections,
+    keepalive_expiry=config.keepalive_expiry,
+    http2=config.http2_enabled,
+    max_upstream_concurrency=config.max_upstream_concurrency,
+    connect_timeout=config.connect_timeout,
+    write_timeout=config.write_timeout,
+    pool_timeout=config.pool_timeout,
 )
 
-async def validate_api_key(x_api_key: Optional[str] = Header(None), authorization: Optional[str] = Header(None)):
+response_cache = ResponseCache(max_size=config.response_cache_max_size, ttl=config.response_cache_ttl)
+request_coalescer = RequestCoalescer()
+
+# Starlette copies response headers, so one dict can be shared by every stream
+_SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Headers": "*",
+    "X-Accel-Buffering": "no",
+}
+
+# Request bodies above this size are converted off the event loop. Conversion costs
+# roughly 1ms per 100KB, so smaller requests are cheaper to convert inline than to
+# hand to a worker thread.
+_CONVERSION_OFFLOAD_BYTES = 256 * 1024
+
+
+# Second-resolution timestamp shared by health/test responses, refreshed by _tick_clock
+# so handlers do not format a datetime on every probe. Index 0 is str, index 1 bytes.
+_now_iso = [datetime.now().isoformat(timespec="seconds")]
+_now_iso.append(_now_iso[0].encode())
+
+
+async def _tick_clock():
+    while True:
+        now = datetime.now().isoformat(timespec="seconds")
+        _now_iso[0], _now_iso[1] = now, now.encode()
+        await asyncio.sleep(1)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Warm up the upstream pool, start the clock and load the token encoding; clean up on shutdown."""
+    # uvicorn's loop="auto" quietly falls back to the stdlib loop when uvloop is missing
+    logger.info(f"Event loop: {type(asyncio.get_running_loop()).__module__}")
+    clock = asyncio.create_task(_tick_clock())
+    # Load the token encoding in the background so startup does not wait on a download
+    _start_token_encoding_load()
+    await openai_client.warm_up()
+    yield
+    clock.cancel()
+    if _token_encoding_load is not None:
+        _token_encoding_load.cancel()
+    await openai_client.aclose()
+
+
+async def _validate_client_api_key(x_api_key: Optional[str] = Header(None), authorization: Optional[str] = Header(None)):
     """Validate the client's API key from either x-api-key header or Authorization header."""
     client_api_key = None
-    
+
     # Extract API key from headers
     if x_api_key:
         client_api_key = x_api_key
     elif authorization and authorization.startswith("Bearer "):
-        client_api_key = authorization.replace("Bearer ", "")
-    
-    # Skip validation if ANTHROPIC_API_KEY is not set in the environment
-    if not config.anthropic_api_key:
-        return
-        
+        client_api_key = authorization[7:]
+
     # Validate the client API key
     if not client_api_key or not config.validate_client_api_key(client_api_key):
         logger.warning(f"Invalid API key provided by client")
@@ -53,8 +128,90 @@ async def validate_api_key(x_api_key: Optional[str] = Header(None), authorizatio
             detail="Invalid API key. Please provide a valid Anthropic API key."
         )
 
-@router.post("/v1/messages")
-async def create_message(request: ClaudeMessagesRequest, http_request: Request, _: None = Depends(validate_api_key)):
+
+async def _skip_api_key_validation():
+    """No-op dependency used when ANTHROPIC_API_KEY is not set."""
+
+
+# Skip header parsing entirely when client API key validation is disabled
+validate_api_key = _validate_client_api_key if config.anthropic_api_key else _skip_api_key_validation
+
+# orjson parses integers outside 64 bits as floats, silently changing them. Bodies with a
+# run of 19+ digits (which JSON cannot hold as raw NUL bytes) use the stdlib parser instead.
+_DIGITS_TO_NUL = bytes.maketrans(b"0123456789", b"\0" * 10)
+_LONG_DIGIT_RUN = b"\0" * 19
+
+
+async def parse_messages_request(http_request: Request, _: None = Depends(validate_api_key)) -> ClaudeMessagesRequest:
+    """Parse the /v1/messages body with orjson instead of FastAPI's stdlib json path.
+
+    Depends on validate_api_key so unauthenticated requests get a 401 before the body
+    is read, rather than a 422 that echoes it back.
+    """
+    body = await http_request.body()
+    try:
+        if _LONG_DIGIT_RUN in body.translate(_DIGITS_TO_NUL):
+            data = json.loads(body)
+        else:
+            data = orjson.loads(body)
+        return ClaudeMessagesRequest.model_validate(data)
+    except json.JSONDecodeError as e:  # also orjson.JSONDecodeError, a subclass
+        raise RequestValidationError(
+            [{"type": "json_invalid", "loc": ("body", e.pos), "msg": "JSON decode error", "input": {}, "ctx": {"error": e.msg}}],
+            body=body,
+        )
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)],
+            body=body,
+        )
+
+async def _watch_disconnect(http_request: Request, disconnected: asyncio.Event, request_id: str):
+    """Read ASGI messages until the client disconnects, then flag it and cancel upstream."""
+    while True:
+        message = await http_request.receive()
+        if message["type"] == "http.disconnect":
+            disconnected.set()
+            openai_client.cancel_request(request_id)
+            return
+
+
+async def _stop_watcher(watcher: asyncio.Task):
+    watcher.cancel()
+
+
+async def _complete_non_streaming(openai_request: dict, request: ClaudeMessagesRequest, request_id: Optional[str] = None) -> dict:
+    """Send a non-streaming request upstream and convert the reply to Claude format."""
+    logger.info("📤 [NON-STREAMING] Sending request to upstream API...")
+    openai_response = await openai_client.create_chat_completion(openai_request, request_id)
+    logger.info(f"📥 [UPSTREAM RESPONSE] Response received from upstream API:")
+    logger.info(f"📦 Upstream Response Body: {json.dumps(openai_response, indent=2, ensure_ascii=False)}")
+    claude_response = convert_openai_to_claude_response(
+        openai_response, request, config.api_provider
+    )
+    logger.info(f"🔄 [CONVERTED BACK] Claude Format Response:")
+    logger.info(f"📦 Final Response Body: {json.dumps(claude_response, indent=2, ensure_ascii=False)}")
+    logger.info("=" * 80)
+    return claude_response
+
+
+# FastAPI cannot see the body parsed by parse_messages_request, so describe it in the
+# OpenAPI schema here. Nested models refer to the $defs kept inside that schema.
+_MESSAGES_BODY_SCHEMA = "#/paths/~1v1~1messages/post/requestBody/content/application~1json/schema"
+_MESSAGES_OPENAPI_EXTRA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {
+                "schema": ClaudeMessagesRequest.model_json_schema(ref_template=_MESSAGES_BODY_SCHEMA + "/$defs/{model}"),
+            }
+        },
+    }
+}
+
+
+@router.post("/v1/messages", openapi_extra=_MESSAGES_OPENAPI_EXTRA)
+async def create_message(http_request: Request, request: ClaudeMessagesRequest = Depends(parse_messages_request)):
     try:
         # Log incoming request headers
         headers_dict = dict(http_request.headers)
@@ -66,17 +223,36 @@ async def create_message(request: ClaudeMessagesRequest, http_request: Request,
         logger.debug(f"Processing Claude request: model={request.model}, stream={request.stream}")
 
         # Generate unique request ID for cancellation tracking
-        request_id = str(uuid.uuid4())
+        request_id = os.urandom(16).hex()
         logger.info(f"🆔 Request ID: {request_id}")
 
         # Convert Claude request to OpenAI format
-        openai_request = convert_claude_to_openai(request, model_manager, config.api_provider)
+        if int(http_request.headers.get("content-length", 0)) > _CONVERSION_OFFLOAD_BYTES:
+            # Large conversations: let other streams progress while we convert
+            openai_request = await run_in_threadpool(
+                convert_claude_to_openai, request, model_manager, config.api_provider
+            )
+        else:
+            openai_request = convert_claude_to_openai(request, model_manager, config.api_provider)
         logger.info(f"🔄 [CONVERTED] OpenAI Format Request:")
         logger.info(f"📦 Converted Request Body: {json.dumps(openai_request, indent=2, ensure_ascii=False)}")
 
-        # Check if client disconnected before processing
-        if await http_request.is_disconnected():
-            raise HTTPException(status_code=499, detail="Client disconnected")
+        # Serve deterministic non-streaming requests from the response cache. Clients can
+        # opt other requests in with "X-Proxy-Cache: readWrite".
+        cache_key = None
+        cache_opt_in = http_request.headers.get("x-proxy-cache", "").lower() == "readwrite"
+        if not request.stream and ResponseCache.is_cacheable(openai_request, cache_opt_in):
+            cache_key = ResponseCache.make_key(request.model, openai_request)
+            if config.response_cache_enabled:
+                cached_response = response_cache.get(cache_key)
+                if cached_response is not None:
+                    logger.info("♻️ [CACHE HIT] Returning cached response")
+                    return ORJSONResponse(cached_response)
+
+        # Single background task watches for disconnects instead of polling per chunk. It also
+        # covers clients that left during conversion: Starlette does not cancel the handler.
+        disconnected = asyncio.Event()
+        watcher = asyncio.create_task(_watch_disconnect(http_request, disconnected, request_id))
 
         if request.stream:
             # Streaming response - wrap in error handling
@@ -85,106 +261,139 @@ async def create_message(request: ClaudeMessagesRequest, http_request: Request,
                     openai_request, request_id
                 )
                 return StreamingResponse(
-                    convert_openai_streaming_to_claude_with_cancellation(
-                        openai_stream,
-                        request,
-                        logger,
-                        http_request,
-                        openai_client,
-                        request_id,
-                        config.api_provider,
-                        config.lmp_api_version,
+                    batch_sse_events(
+                        convert_openai_streaming_to_claude_with_cancellation(
+                            openai_stream,
+                            request,
+                            logger,
+                            disconnected,
+                            request_id,
+                            config.api_provider,
+                            config.lmp_api_version,
+                        )
                     ),
                     media_type="text/event-stream",
-                    headers={
-                        "Cache-Control": "no-cache",
-                        "Connection": "keep-alive",
-                        "Access-Control-Allow-Origin": "*",
-                        "Access-Control-Allow-Headers": "*",
-                    },
+                    headers=_SSE_HEADERS,
+                    background=BackgroundTask(_stop_watcher, watcher),
                 )
             except HTTPException as e:
-                # Convert to proper error response for streaming
-                logger.error(f"Streaming error: {e.detail}")
-                import traceback
-
-                logger.error(traceback.format_exc())
+                watcher.cancel()
+                # Convert to proper error response for streaming; upstream errors are
+                # expected here, so skip the traceback
+                logger.warning(f"Streaming error: {e.detail}")
                 error_message = openai_client.classify_openai_error(e.detail)
                 error_response = {
                     "type": "error",
                     "error": {"type": "api_error", "message": error_message},
                 }
-                return JSONResponse(status_code=e.status_code, content=error_response)
+                return ORJSONResponse(status_code=e.status_code, content=error_response)
         else:
             # Non-streaming response
-            logger.info("📤 [NON-STREAMING] Sending request to upstream API...")
-            openai_response = await openai_client.create_chat_completion(
-                openai_request, request_id
-            )
-            logger.info(f"📥 [UPSTREAM RESPONSE] Response received from upstream API:")
-            logger.info(f"📦 Upstream Response Body: {json.dumps(openai_response, indent=2, ensure_ascii=False)}")
-            claude_response = convert_openai_to_claude_response(
-                openai_response, request, config.api_provider
-            )
-            logger.info(f"🔄 [CONVERTED BACK] Claude Format Response:")
-            logger.info(f"📦 Final Response Body: {json.dumps(claude_response, indent=2, ensure_ascii=False)}")
-            logger.info("=" * 80)
-            return claude_response
+            try:
+                if cache_key is not None:
+                    async def complete_and_cache():
+                        claude_response = await _complete_non_streaming(openai_request, request)
+                        if config.response_cache_enabled and ResponseCache.is_storable(claude_response):
+                            response_cache.set(cache_key, claude_response)
+                        return claude_response
+
+                    # Identical deterministic requests share one upstream call. It is not tied
+                    # to this request_id, so one client disconnecting cannot abort the others;
+                    # only this waiter is cancelled, and the call stops once none are left.
+                    async with openai_client.track_request(request_id):
+                        claude_response = await request_coalescer.run(cache_key, complete_and_cache)
+                else:
+                    claude_response = await _complete_non_streaming(openai_request, request, request_id)
+            finally:
+                watcher.cancel()
+            return ORJSONResponse(claude_response)
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-
         logger.error(f"Unexpected error processing request: {e}")
         logger.error(traceback.format_exc())
         error_message = openai_client.classify_openai_error(str(e))
         raise HTTPException(status_code=500, detail=error_message)
 
 
+# tiktoken encoding once loaded; count_tokens uses the character estimate until then.
+# A failed load is retried after a delay rather than remembered, so a transient download
+# error does not disable exact counts for good.
+_token_encoding = None
+_token_encoding_load: Optional[asyncio.Task] = None
+_token_encoding_retry_at = 0.0
+_TOKEN_ENCODING_RETRY_SECONDS = 60
+
+
+async def _load_token_encoding():
+    global _token_encoding, _token_encoding_retry_at
+    try:
+        # The first load may download the BPE file with no timeout. Use the asyncio default
+        # executor rather than the anyio pool that request handlers offload work to.
+        _token_encoding = await asyncio.to_thread(tiktoken.get_encoding, "cl100k_base")
+    except Exception as e:
+        _token_encoding_retry_at = time.monotonic() + _TOKEN_ENCODING_RETRY_SECONDS
+        logger.warning(f"tiktoken encoding unavailable, using character estimate: {e}")
+
+
+def _start_token_encoding_load():
+    """Start loading the tiktoken encoding in the background unless loaded or already loading."""
+    global _token_encoding_load
+    if _token_encoding is not None or tiktoken is None:
+        return
+    if _token_encoding_load is not None and not _token_encoding_load.done():
+        return
+    if time.monotonic() < _token_encoding_retry_at:
+        return
+    _token_encoding_load = asyncio.create_task(_load_token_encoding())
+
+
 @router.post("/v1/messages/count_tokens")
 async def count_tokens(request: ClaudeTokenCountRequest, _: None = Depends(validate_api_key)):
     try:
-        # For token counting, we'll use a simple estimation
-        # In a real implementation, you might want to use tiktoken or similar
+        # Gather all text in a single pass, then count it in one batch
+        parts = []
 
-        total_chars = 0
-
-        # Count system message characters
+        # System message text
         if request.system:
             if isinstance(request.system, str):
-                total_chars += len(request.system)
+                parts.append(request.system)
             elif isinstance(request.system, list):
-                for block in request.system:
-                    if hasattr(block, "text"):
-                        total_chars += len(block.text)
+                parts.extend(
+                    block.text for block in request.system if isinstance(block, ClaudeSystemContent)
+                )
 
-        # Count message characters
+        # Message text
         for msg in request.messages:
             if msg.content is None:
                 continue
             elif isinstance(msg.content, str):
-                total_chars += len(msg.content)
+                parts.append(msg.content)
             elif isinstance(msg.content, list):
-                for block in msg.content:
-                    if hasattr(block, "text") and block.text is not None:
-                        total_chars += len(block.text)
+                parts.extend(
+                    block.text for block in msg.content if isinstance(block, ClaudeContentBlockText)
+                )
 
-        # Rough estimation: 4 characters per token
-        estimated_tokens = max(1, total_chars // 4)
+        encoding = _token_encoding
+        if encoding is not None:
+            # Native BPE encoder gives exact counts
+            total_tokens = sum(map(len, encoding.encode_ordinary_batch(parts)))
+        else:
+            # Rough estimation: 4 characters per token, until the encoding has loaded
+            _start_token_encoding_load()
+            total_tokens = sum(map(len, parts)) // 4
 
-        return {"input_tokens": estimated_tokens}
+        return {"input_tokens": max(1, total_tokens)}
 
     except Exception as e:
         logger.error(f"Error counting tokens: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/health")
-async def health_check():
-    """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
+# /health is static apart from the timestamp and live stats, so pre-serialize the rest
+_HEALTH_PREFIX = b'{"status":"healthy","timestamp":"'
+_HEALTH_STATIC = orjson.dumps(
+    {
         "openai_api_configured": bool(config.openai_api_key),
         "api_key_valid": config.validate_api_key(),
         "client_api_key_validation": bool(config.anthropic_api_key),
@@ -192,6 +401,42 @@ async def health_check():
         "lmp_api_version": config.lmp_api_version,
         "mock_models": config.mock_models,
     }
+)[1:-1]
+
+
+@router.get("/health")
+async def health_check():
+    """Health check endpoint"""
+    return Response(
+        b"".join(
+            (
+                _HEALTH_PREFIX,
+                _now_iso[1],
+                b'",',
+                _HEALTH_STATIC,
+                b',"response_cache":',
+                orjson.dumps(response_cache.stats()),
+                b',"upstream":',
+                orjson.dumps(openai_client.upstream_stats()),
+                b"}",
+            )
+        ),
+        media_type="application/json",
+    )
+
+
+# Probe request and failure hints for /test-connection; never mutated, so built once.
+# Non-streaming completions send the request as-is, so sharing the dict is safe.
+_TEST_PAYLOAD = {
+    "model": config.small_model,
+    "messages": [{"role": "user", "content": "Hello"}],
+    "max_tokens": 5,
+}
+_TEST_SUGGESTIONS = (
+    "Check your OPENAI_API_KEY is valid",
+    "Verify your API key has the necessary permissions",
+    "Check if you have reached rate limits",
+)
 
 
 @router.get("/test-connection")
@@ -199,44 +444,32 @@ async def test_connection():
     """Test API connectivity to OpenAI"""
     try:
         # Simple test request to verify API connectivity
-        test_response = await openai_client.create_chat_completion(
-            {
-                "model": config.small_model,
-                "messages": [{"role": "user", "content": "Hello"}],
-                "max_tokens": 5,
-            }
-        )
+        test_response = await openai_client.create_chat_completion(_TEST_PAYLOAD)
 
         return {
             "status": "success",
             "message": "Successfully connected to OpenAI API",
             "model_used": config.small_model,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": _now_iso[0],
             "response_id": test_response.get("id", "unknown"),
         }
 
     except Exception as e:
         logger.error(f"API connectivity test failed: {e}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=503,
             content={
                 "status": "failed",
                 "error_type": "API Error",
                 "message": str(e),
-                "timestamp": datetime.now().isoformat(),
-                "suggestions": [
-                    "Check your OPENAI_API_KEY is valid",
-                    "Verify your API key has the necessary permissions",
-                    "Check if you have reached rate limits",
-                ],
+                "timestamp": _now_iso[0],
+                "suggestions": _TEST_SUGGESTIONS,
             },
         )
 
 
-@router.get("/")
-async def root():
-    """Root endpoint"""
-    return {
+_ROOT_JSON = orjson.dumps(
+    {
         "message": "Claude-to-OpenAI API Proxy v1.0.0",
         "status": "running",
         "config": {
@@ -256,6 +489,13 @@ async def root():
             "test_connection": "/test-connection",
         },
     }
+)
+
+
+@router.get("/")
+async def root():
+    """Root endpoint"""
+    return Response(_ROOT_JSON, media_type="application/json")
 
 
 # Model aliases for Claude models
@@ -271,7 +511,6 @@ CLAUDE_MODEL_ALIASES = {
     "claude-3.5-sonnet": "sonnet",
     # Claude 3 Opus
     "claude-3-opus-20240229": "opus",
-    "claude-3-opus-20240229": "opus",
     "claude-3-opus": "opus",
     # Claude 3 Haiku
     "claude-3-haiku-20240307": "haiku",
@@ -280,59 +519,56 @@ CLAUDE_MODEL_ALIASES = {
 }
 
 
+# Case-insensitive alias lookup, built once at import time
+_ALIASES_CI = {alias.lower(): tier for alias, tier in CLAUDE_MODEL_ALIASES.items()}
+
+# Static model info per tier; config values are fixed after startup
+_MODEL_TIER_INFO = {
+    "sonnet": {
+        "name": "Claude 3.5 Sonnet",
+        "display_name": f"Claude 3.5 Sonnet ({config.middle_model})",
+        "type": "model",
+        "created": 1708572800,
+        "updated": 1728604800,
+    },
+    "opus": {
+        "name": "Claude 3 Opus",
+        "display_name": f"Claude 3 Opus ({config.big_model})",
+        "type": "model",
+        "created": 1708572800,
+        "updated": 1709241600,
+    },
+    "haiku": {
+        "name": "Claude 3 Haiku",
+        "display_name": f"Claude 3 Haiku ({config.small_model})",
+        "type": "model",
+        "created": 1708572800,
+        "updated": 1709241600,
+    },
+}
+
+
+@lru_cache(maxsize=256)  # bounded: model_id comes straight from the URL
 def get_model_info(model_id: str) -> Optional[dict]:
-    """Get model info based on model ID, returns None if not found."""
-    # Try exact match first
-    tier = CLAUDE_MODEL_ALIASES.get(model_id)
-    if not tier:
-        # Try case-insensitive match
-        model_id_lower = model_id.lower()
-        for alias, t in CLAUDE_MODEL_ALIASES.items():
-            if alias.lower() == model_id_lower:
-                tier = t
-                break
-
-    if tier == "sonnet":
-        return {
-            "id": model_id,
-            "name": "Claude 3.5 Sonnet",
-            "display_name": f"Claude 3.5 Sonnet ({config.middle_model})",
-            "type": "model",
-            "created": 1708572800,
-            "updated": 1728604800,
-        }
-    elif tier == "opus":
-        return {
-            "id": model_id,
-            "name": "Claude 3 Opus",
-            "display_name": f"Claude 3 Opus ({config.big_model})",
-            "type": "model",
-            "created": 1708572800,
-            "updated": 1709241600,
-        }
-    elif tier == "haiku":
-        return {
-            "id": model_id,
-            "name": "Claude 3 Haiku",
-            "display_name": f"Claude 3 Haiku ({config.small_model})",
-            "type": "model",
-            "created": 1708572800,
-            "updated": 1709241600,
-        }
-    return None
+    """Get model info based on model ID, returns None if not found.
 
+    Results are cached and shared between callers, so do not mutate them.
+    """
+    # Try exact match first, then case-insensitive match
+    tier = CLAUDE_MODEL_ALIASES.get(model_id) or _ALIASES_CI.get(model_id.lower())
+    info = _MODEL_TIER_INFO.get(tier)
+    if info is None:
+        return None
+    return {"id": model_id, **info}
 
-@router.get("/v1/models")
-async def list_models(_: None = Depends(validate_api_key)):
-    """List all available models (Claude API compatible)"""
-    if not config.mock_models:
-        raise HTTPException(status_code=404, detail="Not Found")
 
+def _build_models_list() -> dict:
+    """Build the /v1/models payload from the aliases and configured models."""
     models = []
     seen_models = set()
 
     # Add Claude model aliases
-    for model_id, tier in CLAUDE_MODEL_ALIASES.items():
+    for model_id in CLAUDE_MODEL_ALIASES:
         if model_id not in seen_models:
             info = get_model_info(model_id)
             if info:
@@ -360,6 +596,18 @@ async def list_models(_: None = Depends(validate_api_key)):
     }
 
 
+_MODELS_JSON = orjson.dumps(_build_models_list())
+
+
+@router.get("/v1/models")
+async def list_models(_: None = Depends(validate_api_key)):
+    """List all available models (Claude API compatible)"""
+    if not config.mock_models:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    return Response(_MODELS_JSON, media_type="application/json")
+
+
 @router.get("/v1/models/{model_id}")
 async def get_model(model_id: str, _: None = Depends(validate_api_key)):
     """Get model details (Claude API compatible)"""
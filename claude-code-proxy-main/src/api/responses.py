@@ -0,0 +1,15 @@
+import orjson
+from typing import Any
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson instead of the stdlib encoder."""
+
+    def render(self, content: Any) -> bytes:
+        try:
+            return orjson.dumps(content)
+        except TypeError:
+            # orjson rejects ints wider than 64 bits, which tool call arguments parsed
+            # with the stdlib can hold; the stdlib encoder has no such limit
+            return super().render(content)
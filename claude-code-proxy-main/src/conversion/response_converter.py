@@ -1,10 +1,104 @@
+import asyncio
 import json
-import uuid
-from fastapi import HTTPException, Request
+import os
+import orjson
+import traceback
+from fastapi import HTTPException
 from src.core.constants import Constants
 from src.models.claude import ClaudeMessagesRequest
 
 
+_STREAM_END = object()
+
+
+def _sse_prefix(event_type: str) -> bytes:
+    return f"event: {event_type}\ndata: ".encode()
+
+
+# SSE framing is encoded once; events only serialise their payload with orjson
+_SSE_MESSAGE_START = _sse_prefix(Constants.EVENT_MESSAGE_START)
+_SSE_CONTENT_BLOCK_START = _sse_prefix(Constants.EVENT_CONTENT_BLOCK_START)
+_SSE_PING = _sse_prefix(Constants.EVENT_PING)
+_SSE_CONTENT_BLOCK_DELTA = _sse_prefix(Constants.EVENT_CONTENT_BLOCK_DELTA)
+_SSE_CONTENT_BLOCK_STOP = _sse_prefix(Constants.EVENT_CONTENT_BLOCK_STOP)
+_SSE_MESSAGE_DELTA = _sse_prefix(Constants.EVENT_MESSAGE_DELTA)
+_SSE_MESSAGE_STOP = _sse_prefix(Constants.EVENT_MESSAGE_STOP)
+_SSE_ERROR = _sse_prefix("error")
+
+
+def _sse(prefix: bytes, data) -> bytes:
+    """Frame one SSE event from a pre-encoded prefix and its JSON payload."""
+    return b"".join((prefix, orjson.dumps(data), b"\n\n"))
+
+
+# Text deltas are most of a stream and only their text varies, so splice the text into
+# a pre-rendered event instead of building and serialising the whole dict per token.
+_TEXT_DELTA_HEAD, _TEXT_DELTA_TAIL = _sse(
+    _SSE_CONTENT_BLOCK_DELTA,
+    {"type": Constants.EVENT_CONTENT_BLOCK_DELTA, "index": 0, "delta": {"type": Constants.DELTA_TEXT, "text": "\0"}},
+).split(orjson.dumps("\0"))
+
+
+def _text_delta_event(text: str) -> bytes:
+    """SSE content_block_delta event for text on block 0."""
+    return b"".join((_TEXT_DELTA_HEAD, orjson.dumps(text), _TEXT_DELTA_TAIL))
+
+
+async def batch_sse_events(events, max_bytes: int = 8192, max_delay_ms: float = 2):
+    """Coalesce SSE events into larger writes to cut per-chunk ASGI send overhead.
+
+    Events that are already available are merged into one buffer, which is flushed
+    once it reaches max_bytes or when no further event arrives within max_delay_ms.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=64)
+    max_delay = max_delay_ms / 1000
+
+    async def produce():
+        try:
+            async for event in events:
+                await queue.put(event.encode() if isinstance(event, str) else event)
+        except Exception as e:
+            await queue.put(e)
+        finally:
+            # Close the wrapped stream from this task, so its cleanup is not interrupted
+            # by the cancellation of the response task that consumes the queue
+            await events.aclose()
+        await queue.put(_STREAM_END)
+
+    producer = asyncio.create_task(produce())
+    buffer = bytearray()
+    try:
+        while True:
+            item = await queue.get()
+            while True:
+                if item is _STREAM_END:
+                    if buffer:
+                        yield bytes(buffer)
+                    return
+                if isinstance(item, Exception):
+                    if buffer:
+                        yield bytes(buffer)
+                    raise item
+                buffer += item
+                if len(buffer) >= max_bytes:
+                    break
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    try:
+                        item = await asyncio.wait_for(queue.get(), max_delay)
+                    except asyncio.TimeoutError:
+                        break
+            yield bytes(buffer)
+            buffer.clear()
+    finally:
+        # Stop the producer and wait for it to close the wrapped stream rather than leaving
+        # the upstream response (and its concurrency slot) to the asyncgen finalizer.
+        # asyncio.wait does not forward a cancellation of this task into the producer.
+        producer.cancel()
+        await asyncio.wait({producer})
+
+
 def handle_lmp_error_response(error_data: dict) -> dict:
     """Handle LMP error response format {code, success, message, data}."""
     error_code = error_data.get("code", "")
@@ -78,7 +172,7 @@ def convert_openai_to_claude_response(
             content_blocks.append(
                 {
                     "type": Constants.CONTENT_TOOL_USE,
-                    "id": tool_call.get("id", f"tool_{uuid.uuid4()}"),
+                    "id": tool_call.get("id", f"tool_{os.urandom(16).hex()}"),
                     "name": function_data.get("name", ""),
                     "input": arguments,
                 }
@@ -99,7 +193,7 @@ def convert_openai_to_claude_response(
 
     # Build Claude response
     claude_response = {
-        "id": openai_response.get("id", f"msg_{uuid.uuid4()}"),
+        "id": openai_response.get("id", f"msg_{os.urandom(16).hex()}"),
         "type": "message",
         "role": Constants.ROLE_ASSISTANT,
         "model": original_request.model,
@@ -126,14 +220,14 @@ async def convert_openai_streaming_to_claude(
 ):
     """Convert OpenAI streaming response to Claude streaming format."""
 
-    message_id = f"msg_{uuid.uuid4().hex[:24]}"
+    message_id = f"msg_{os.urandom(12).hex()}"
 
     # Send initial SSE events
-    yield f"event: {Constants.EVENT_MESSAGE_START}\ndata: {json.dumps({'type': Constants.EVENT_MESSAGE_START, 'message': {'id': message_id, 'type': 'message', 'role': Constants.ROLE_ASSISTANT, 'model': original_request.model, 'content': [], 'stop_reason': None, 'stop_sequence': None, 'usage': {'input_tokens': 0, 'output_tokens': 0}}}, ensure_ascii=False)}\n\n"
+    yield _sse(_SSE_MESSAGE_START, {'type': Constants.EVENT_MESSAGE_START, 'message': {'id': message_id, 'type': 'message', 'role': Constants.ROLE_ASSISTANT, 'model': original_request.model, 'content': [], 'stop_reason': None, 'stop_sequence': None, 'usage': {'input_tokens': 0, 'output_tokens': 0}}})
 
-    yield f"event: {Constants.EVENT_CONTENT_BLOCK_START}\ndata: {json.dumps({'type': Constants.EVENT_CONTENT_BLOCK_START, 'index': 0, 'content_block': {'type': Constants.CONTENT_TEXT, 'text': ''}}, ensure_ascii=False)}\n\n"
+    yield _sse(_SSE_CONTENT_BLOCK_START, {'type': Constants.EVENT_CONTENT_BLOCK_START, 'index': 0, 'content_block': {'type': Constants.CONTENT_TEXT, 'text': ''}})
 
-    yield f"event: {Constants.EVENT_PING}\ndata: {json.dumps({'type': Constants.EVENT_PING}, ensure_ascii=False)}\n\n"
+    yield _sse(_SSE_PING, {'type': Constants.EVENT_PING})
 
     # Process streaming chunks
     text_block_index = 0
@@ -144,19 +238,19 @@ async def convert_openai_streaming_to_claude(
     try:
         async for line in openai_stream:
             if line.strip():
-                if line.startswith("data: "):
+                if line.startswith(b"data: "):
                     chunk_data = line[6:]
-                    if chunk_data.strip() == "[DONE]":
+                    if chunk_data.strip() == b"[DONE]":
                         break
 
                     try:
-                        chunk = json.loads(chunk_data)
+                        chunk = orjson.loads(chunk_data)
                         choices = chunk.get("choices", [])
                         if not choices:
                             continue
                     except json.JSONDecodeError as e:
                         logger.warning(
-                            f"Failed to parse chunk: {chunk_data}, error: {e}"
+                            f"Failed to parse chunk: {chunk_data.decode(errors='replace')}, error: {e}"
                         )
                         continue
 
@@ -166,7 +260,7 @@ async def convert_openai_streaming_to_claude(
 
                     # Handle text delta
                     if delta and "content" in delta and delta["content"] is not None:
-                        yield f"event: {Constants.EVENT_CONTENT_BLOCK_DELTA}\ndata: {json.dumps({'type': Constants.EVENT_CONTENT_BLOCK_DELTA, 'index': text_block_index, 'delta': {'type': Constants.DELTA_TEXT, 'text': delta['content']}}, ensure_ascii=False)}\n\n"
+                        yield _sse(_SSE_CONTENT_BLOCK_DELTA, {'type': Constants.EVENT_CONTENT_BLOCK_DELTA, 'index': text_block_index, 'delta': {'type': Constants.DELTA_TEXT, 'text': delta['content']}})
 
                     # Handle tool call deltas with improved incremental processing
                     if "tool_calls" in delta:
@@ -202,22 +296,23 @@ async def convert_openai_streaming_to_claude(
                                 tool_call["claude_index"] = claude_index
                                 tool_call["started"] = True
                                 
-                                yield f"event: {Constants.EVENT_CONTENT_BLOCK_START}\ndata: {json.dumps({'type': Constants.EVENT_CONTENT_BLOCK_START, 'index': claude_index, 'content_block': {'type': Constants.CONTENT_TOOL_USE, 'id': tool_call['id'], 'name': tool_call['name'], 'input': {}}}, ensure_ascii=False)}\n\n"
+                                yield _sse(_SSE_CONTENT_BLOCK_START, {'type': Constants.EVENT_CONTENT_BLOCK_START, 'index': claude_index, 'content_block': {'type': Constants.CONTENT_TOOL_USE, 'id': tool_call['id'], 'name': tool_call['name'], 'input': {}}})
                             
                             # Handle function arguments
                             if "arguments" in function_data and tool_call["started"] and function_data["arguments"] is not None:
                                 tool_call["args_buffer"] += function_data["arguments"]
                                 
-                                # Try to parse complete JSON and send delta when we have valid JSON
-                                try:
-                                    json.loads(tool_call["args_buffer"])
-                                    # If parsing succeeds and we haven't sent this JSON yet
-                                    if not tool_call["json_sent"]:
-                                        yield f"event: {Constants.EVENT_CONTENT_BLOCK_DELTA}\ndata: {json.dumps({'type': Constants.EVENT_CONTENT_BLOCK_DELTA, 'index': tool_call['claude_index'], 'delta': {'type': Constants.DELTA_INPUT_JSON, 'partial_json': tool_call['args_buffer']}}, ensure_ascii=False)}\n\n"
+                                # Try to parse complete JSON and send delta when we have valid JSON. Arguments
+                                # are a JSON object, so only parse once the buffer ends in "}" instead of
+                                # re-parsing the whole buffer on every fragment.
+                                if not tool_call["json_sent"] and tool_call["args_buffer"].rstrip().endswith("}"):
+                                    try:
+                                        orjson.loads(tool_call["args_buffer"])
+                                        yield _sse(_SSE_CONTENT_BLOCK_DELTA, {'type': Constants.EVENT_CONTENT_BLOCK_DELTA, 'index': tool_call['claude_index'], 'delta': {'type': Constants.DELTA_INPUT_JSON, 'partial_json': tool_call['args_buffer']}})
                                         tool_call["json_sent"] = True
-                                except json.JSONDecodeError:
-                                    # JSON is incomplete, continue accumulating
-                                    pass
+                                    except json.JSONDecodeError:
+                                        # JSON is incomplete, continue accumulating
+                                        pass
 
                     # Handle finish reason
                     if finish_reason:
@@ -234,34 +329,31 @@ async def convert_openai_streaming_to_claude(
     except Exception as e:
         # Handle any streaming errors gracefully
         logger.error(f"Streaming error: {e}")
-        import traceback
-
         logger.error(traceback.format_exc())
         error_event = {
             "type": "error",
             "error": {"type": "api_error", "message": f"Streaming error: {str(e)}"},
         }
-        yield f"event: error\ndata: {json.dumps(error_event, ensure_ascii=False)}\n\n"
+        yield _sse(_SSE_ERROR, error_event)
         return
 
     # Send final SSE events
-    yield f"event: {Constants.EVENT_CONTENT_BLOCK_STOP}\ndata: {json.dumps({'type': Constants.EVENT_CONTENT_BLOCK_STOP, 'index': text_block_index}, ensure_ascii=False)}\n\n"
+    yield _sse(_SSE_CONTENT_BLOCK_STOP, {'type': Constants.EVENT_CONTENT_BLOCK_STOP, 'index': text_block_index})
 
     for tool_data in current_tool_calls.values():
         if tool_data.get("started") and tool_data.get("claude_index") is not None:
-            yield f"event: {Constants.EVENT_CONTENT_BLOCK_STOP}\ndata: {json.dumps({'type': Constants.EVENT_CONTENT_BLOCK_STOP, 'index': tool_data['claude_index']}, ensure_ascii=False)}\n\n"
+            yield _sse(_SSE_CONTENT_BLOCK_STOP, {'type': Constants.EVENT_CONTENT_BLOCK_STOP, 'index': tool_data['claude_index']})
 
     usage_data = {"input_tokens": 0, "output_tokens": 0}
-    yield f"event: {Constants.EVENT_MESSAGE_DELTA}\ndata: {json.dumps({'type': Constants.EVENT_MESSAGE_DELTA, 'delta': {'stop_reason': final_stop_reason, 'stop_sequence': None}, 'usage': usage_data}, ensure_ascii=False)}\n\n"
-    yield f"event: {Constants.EVENT_MESSAGE_STOP}\ndata: {json.dumps({'type': Constants.EVENT_MESSAGE_STOP}, ensure_ascii=False)}\n\n"
+    yield _sse(_SSE_MESSAGE_DELTA, {'type': Constants.EVENT_MESSAGE_DELTA, 'delta': {'stop_reason': final_stop_reason, 'stop_sequence': None}, 'usage': usage_data})
+    yield _sse(_SSE_MESSAGE_STOP, {'type': Constants.EVENT_MESSAGE_STOP})
 
 
 async def convert_openai_streaming_to_claude_with_cancellation(
     openai_stream,
     original_request: ClaudeMessagesRequest,
     logger,
-    http_request: Request,
-    openai_client,
+    disconnected: asyncio.Event,
     request_id: str,
     api_provider: str = "openai",
     lmp_api_version: str = "",
@@ -274,21 +366,20 @@ async def convert_openai_streaming_to_claude_with_cancellation(
             openai_stream,
             original_request,
             logger,
-            http_request,
-            openai_client,
+            disconnected,
             request_id,
         ):
             yield chunk
         return
 
-    message_id = f"msg_{uuid.uuid4().hex[:24]}"
+    message_id = f"msg_{os.urandom(12).hex()}"
 
     # Send initial SSE events
-    yield f"event: {Constants.EVENT_MESSAGE_START}\ndata: {json.dumps({'type': Constants.EVENT_MESSAGE_START, 'message': {'id': message_id, 'type': 'message', 'role': Constants.ROLE_ASSISTANT, 'model': original_request.model, 'content': [], 'stop_reason': None, 'stop_sequence': None, 'usage': {'input_tokens': 0, 'output_tokens': 0}}}, ensure_ascii=False)}\n\n"
+    yield _sse(_SSE_MESSAGE_START, {'type': Constants.EVENT_MESSAGE_START, 'message': {'id': message_id, 'type': 'message', 'role': Constants.ROLE_ASSISTANT, 'model': original_request.model, 'content': [], 'stop_reason': None, 'stop_sequence': None, 'usage': {'input_tokens': 0, 'output_tokens': 0}}})
 
-    yield f"event: {Constants.EVENT_CONTENT_BLOCK_START}\ndata: {json.dumps({'type': Constants.EVENT_CONTENT_BLOCK_START, 'index': 0, 'content_block': {'type': Constants.CONTENT_TEXT, 'text': ''}}, ensure_ascii=False)}\n\n"
+    yield _sse(_SSE_CONTENT_BLOCK_START, {'type': Constants.EVENT_CONTENT_BLOCK_START, 'index': 0, 'content_block': {'type': Constants.CONTENT_TEXT, 'text': ''}})
 
-    yield f"event: {Constants.EVENT_PING}\ndata: {json.dumps({'type': Constants.EVENT_PING}, ensure_ascii=False)}\n\n"
+    yield _sse(_SSE_PING, {'type': Constants.EVENT_PING})
 
     # Process streaming chunks
     text_block_index = 0
@@ -297,23 +388,33 @@ async def convert_openai_streaming_to_claude_with_cancellation(
     final_stop_reason = Constants.STOP_END_TURN
     usage_data = {"input_tokens": 0, "output_tokens": 0}
 
+    # Bound once so the per-line check is a plain call
+    is_disconnected = disconnected.is_set
     try:
         async for line in openai_stream:
-            # Check if client disconnected
-            if await http_request.is_disconnected():
-                logger.info(f"Client disconnected, cancelling request {request_id}")
-                openai_client.cancel_request(request_id)
-                break
+            # The disconnect watcher cancels the upstream call; just stop here if we
+            # get to see the flag first
+            if is_disconnected():
+                logger.info(f"Client disconnected, stopping stream for request {request_id}")
+                return
 
             if line.strip():
-                if line.startswith("data: "):
-                    chunk_data = line[6:]
-                    if chunk_data.strip() == "[DONE]":
+                # Upstream SSE lines are forwarded raw, so accept "data:" with or without a space
+                if line.startswith(b"data:"):
+                    chunk_data = line[5:]
+                    if chunk_data.strip() == b"[DONE]":
                         break
 
                     try:
-                        chunk = json.loads(chunk_data)
+                        chunk = orjson.loads(chunk_data)
                         # logger.info(f"OpenAI chunk: {chunk}")
+                        error = chunk.get("error")
+                        if error:
+                            # Mid-stream failures arrive as a chunk carrying an error object
+                            message = error.get("message") if isinstance(error, dict) else str(error)
+                            logger.warning(f"Upstream streaming error: {message}")
+                            yield _sse(_SSE_ERROR, {"type": "error", "error": {"type": "api_error", "message": f"Streaming error: {message}"}})
+                            return
                         usage = chunk.get("usage", None)
                         if usage:
                             cache_read_input_tokens = 0
@@ -330,7 +431,7 @@ async def convert_openai_streaming_to_claude_with_cancellation(
                             continue
                     except json.JSONDecodeError as e:
                         logger.warning(
-                            f"Failed to parse chunk: {chunk_data}, error: {e}"
+                            f"Failed to parse chunk: {chunk_data.decode(errors='replace')}, error: {e}"
                         )
                         continue
 
@@ -339,8 +440,9 @@ async def convert_openai_streaming_to_claude_with_cancellation(
                     finish_reason = choice.get("finish_reason")
 
                     # Handle text delta
-                    if delta and "content" in delta and delta["content"] is not None:
-                        yield f"event: {Constants.EVENT_CONTENT_BLOCK_DELTA}\ndata: {json.dumps({'type': Constants.EVENT_CONTENT_BLOCK_DELTA, 'index': text_block_index, 'delta': {'type': Constants.DELTA_TEXT, 'text': delta['content']}}, ensure_ascii=False)}\n\n"
+                    content = delta.get("content")
+                    if content is not None:
+                        yield _text_delta_event(content)
 
                     # Handle tool call deltas with improved incremental processing
                     if "tool_calls" in delta and delta["tool_calls"]:
@@ -376,22 +478,23 @@ async def convert_openai_streaming_to_claude_with_cancellation(
                                 tool_call["claude_index"] = claude_index
                                 tool_call["started"] = True
                                 
-                                yield f"event: {Constants.EVENT_CONTENT_BLOCK_START}\ndata: {json.dumps({'type': Constants.EVENT_CONTENT_BLOCK_START, 'index': claude_index, 'content_block': {'type': Constants.CONTENT_TOOL_USE, 'id': tool_call['id'], 'name': tool_call['name'], 'input': {}}}, ensure_ascii=False)}\n\n"
+                                yield _sse(_SSE_CONTENT_BLOCK_START, {'type': Constants.EVENT_CONTENT_BLOCK_START, 'index': claude_index, 'content_block': {'type': Constants.CONTENT_TOOL_USE, 'id': tool_call['id'], 'name': tool_call['name'], 'input': {}}})
                             
                             # Handle function arguments
                             if "arguments" in function_data and tool_call["started"] and function_data["arguments"] is not None:
                                 tool_call["args_buffer"] += function_data["arguments"]
                                 
-                                # Try to parse complete JSON and send delta when we have valid JSON
-                                try:
-                                    json.loads(tool_call["args_buffer"])
-                                    # If parsing succeeds and we haven't sent this JSON yet
-                                    if not tool_call["json_sent"]:
-                                        yield f"event: {Constants.EVENT_CONTENT_BLOCK_DELTA}\ndata: {json.dumps({'type': Constants.EVENT_CONTENT_BLOCK_DELTA, 'index': tool_call['claude_index'], 'delta': {'type': Constants.DELTA_INPUT_JSON, 'partial_json': tool_call['args_buffer']}}, ensure_ascii=False)}\n\n"
+                                # Try to parse complete JSON and send delta when we have valid JSON. Arguments
+                                # are a JSON object, so only parse once the buffer ends in "}" instead of
+                                # re-parsing the whole buffer on every fragment.
+                                if not tool_call["json_sent"] and tool_call["args_buffer"].rstrip().endswith("}"):
+                                    try:
+                                        orjson.loads(tool_call["args_buffer"])
+                                        yield _sse(_SSE_CONTENT_BLOCK_DELTA, {'type': Constants.EVENT_CONTENT_BLOCK_DELTA, 'index': tool_call['claude_index'], 'delta': {'type': Constants.DELTA_INPUT_JSON, 'partial_json': tool_call['args_buffer']}})
                                         tool_call["json_sent"] = True
-                                except json.JSONDecodeError:
-                                    # JSON is incomplete, continue accumulating
-                                    pass
+                                    except json.JSONDecodeError:
+                                        # JSON is incomplete, continue accumulating
+                                        pass
 
                     # Handle finish reason
                     if finish_reason:
@@ -415,54 +518,55 @@ async def convert_openai_streaming_to_claude_with_cancellation(
                     "message": "Request was cancelled by client",
                 },
             }
-            yield f"event: error\ndata: {json.dumps(error_event, ensure_ascii=False)}\n\n"
+            yield _sse(_SSE_ERROR, error_event)
             return
         else:
             raise
     except Exception as e:
         # Handle any streaming errors gracefully
         logger.error(f"Streaming error: {e}")
-        import traceback
-
         logger.error(traceback.format_exc())
         error_event = {
             "type": "error",
             "error": {"type": "api_error", "message": f"Streaming error: {str(e)}"},
         }
-        yield f"event: error\ndata: {json.dumps(error_event, ensure_ascii=False)}\n\n"
+        yield _sse(_SSE_ERROR, error_event)
         return
+    finally:
+        # Close the upstream stream however this generator ends, including being closed
+        # early by the response, so the connection and its concurrency slot are released now
+        await openai_stream.aclose()
 
     # Send final SSE events
-    yield f"event: {Constants.EVENT_CONTENT_BLOCK_STOP}\ndata: {json.dumps({'type': Constants.EVENT_CONTENT_BLOCK_STOP, 'index': text_block_index}, ensure_ascii=False)}\n\n"
+    yield _sse(_SSE_CONTENT_BLOCK_STOP, {'type': Constants.EVENT_CONTENT_BLOCK_STOP, 'index': text_block_index})
 
     for tool_data in current_tool_calls.values():
         if tool_data.get("started") and tool_data.get("claude_index") is not None:
-            yield f"event: {Constants.EVENT_CONTENT_BLOCK_STOP}\ndata: {json.dumps({'type': Constants.EVENT_CONTENT_BLOCK_STOP, 'index': tool_data['claude_index']}, ensure_ascii=False)}\n\n"
+            yield _sse(_SSE_CONTENT_BLOCK_STOP, {'type': Constants.EVENT_CONTENT_BLOCK_STOP, 'index': tool_data['claude_index']})
 
-    yield f"event: {Constants.EVENT_MESSAGE_DELTA}\ndata: {json.dumps({'type': Constants.EVENT_MESSAGE_DELTA, 'delta': {'stop_reason': final_stop_reason, 'stop_sequence': None}, 'usage': usage_data}, ensure_ascii=False)}\n\n"
-    yield f"event: {Constants.EVENT_MESSAGE_STOP}\ndata: {json.dumps({'type': Constants.EVENT_MESSAGE_STOP}, ensure_ascii=False)}\n\n"
+    yield _sse(_SSE_MESSAGE_DELTA, {'type': Constants.EVENT_MESSAGE_DELTA, 'delta': {'stop_reason': final_stop_reason, 'stop_sequence': None}, 'usage': usage_data})
+    yield _sse(_SSE_MESSAGE_STOP, {'type': Constants.EVENT_MESSAGE_STOP})
 
 
 async def convert_lmp_v2_streaming_to_claude(
     openai_stream,
     original_request: ClaudeMessagesRequest,
     logger,
-    http_request: Request = None,
-    openai_client = None,
+    disconnected: asyncio.Event = None,
     request_id: str = None,
 ):
     """Convert LMP V2 streaming response (no 'data:' prefix) to Claude streaming format."""
 
-    message_id = f"msg_{uuid.uuid4().hex[:24]}"
+    message_id = f"msg_{os.urandom(12).hex()}"
     lmp_metadata = {}
     first_chunk = True
 
     # Send initial SSE events
-    yield f"event: {Constants.EVENT_MESSAGE_START}\ndata: {json.dumps({'type': Constants.EVENT_MESSAGE_START, 'message': {'id': message_id, 'type': 'message', 'role': Constants.ROLE_ASSISTANT, 'model': original_request.model, 'content': [], 'stop_reason': None, 'stop_sequence': None, 'usage': {'input_tokens': 0, 'output_tokens': 0}}}, ensure_ascii=False)}\n\n"
+    yield _sse(_SSE_MESSAGE_START, {'type': Constants.EVENT_MESSAGE_START, 'message': {'id': message_id, 'type': 'message', 'role': Constants.ROLE_ASSISTANT, 'model': original_request.model, 'content': [], 'stop_reason': None, 'stop_sequence': None, 'usage': {'input_tokens': 0, 'output_tokens': 0}}})
 
-    yield f"event: {Constants.EVENT_CONTENT_BLOCK_START}\ndata: {json.dumps({'type': Constants.EVENT_CONTENT_BLOCK_START, 'index': 0, 'content_block': {'type': Constants.CONTENT_TEXT, 'text': ''}}, ensure_ascii=False)}\n\n"
+    yield _sse(_SSE_CONTENT_BLOCK_START, {'type': Constants.EVENT_CONTENT_BLOCK_START, 'index': 0, 'content_block': {'type': Constants.CONTENT_TEXT, 'text': ''}})
 
-    yield f"event: {Constants.EVENT_PING}\ndata: {json.dumps({'type': Constants.EVENT_PING}, ensure_ascii=False)}\n\n"
+    yield _sse(_SSE_PING, {'type': Constants.EVENT_PING})
 
     # Process streaming chunks
     text_block_index = 0
@@ -471,27 +575,23 @@ async def convert_lmp_v2_streaming_to_claude(
     final_stop_reason = Constants.STOP_END_TURN
     usage_data = {"input_tokens": 0, "output_tokens": 0}
 
+    # Bound once so the per-line check is a plain call
+    is_disconnected = disconnected.is_set if disconnected is not None else None
     try:
         async for line in openai_stream:
-            # Check for client disconnection if http_request is provided
-            if http_request:
-                try:
-                    if await http_request.is_disconnected():
-                        logger.info(f"Client disconnected, cancelling request {request_id}")
-                        if openai_client and request_id:
-                            openai_client.cancel_request(request_id)
-                        break
-                except:
-                    pass
-
-            if line.strip():
-                # LMP V2 format: no "data:" prefix, direct JSON
-                chunk_data = line.strip()
-                if chunk_data == "[DONE]":
+            # Check for client disconnection if a disconnect event is provided
+            if is_disconnected is not None and is_disconnected():
+                logger.info(f"Client disconnected, stopping stream for request {request_id}")
+                return
+
+            # LMP V2 format: no "data:" prefix, direct JSON
+            chunk_data = line.strip()
+            if chunk_data:
+                if chunk_data == b"[DONE]":
                     break
 
                 try:
-                    chunk = json.loads(chunk_data)
+                    chunk = orjson.loads(chunk_data)
 
                     # Extract LMP metadata from first chunk
                     if first_chunk:
@@ -526,8 +626,9 @@ async def convert_lmp_v2_streaming_to_claude(
                     finish_reason = choice.get("finish_reason")
 
                     # Handle text delta
-                    if delta and "content" in delta and delta["content"] is not None:
-                        yield f"event: {Constants.EVENT_CONTENT_BLOCK_DELTA}\ndata: {json.dumps({'type': Constants.EVENT_CONTENT_BLOCK_DELTA, 'index': text_block_index, 'delta': {'type': Constants.DELTA_TEXT, 'text': delta['content']}}, ensure_ascii=False)}\n\n"
+                    content = delta.get("content")
+                    if content is not None:
+                        yield _text_delta_event(content)
 
                     # Handle tool call deltas
                     if "tool_calls" in delta and delta["tool_calls"]:
@@ -559,18 +660,18 @@ async def convert_lmp_v2_streaming_to_claude(
                                 tool_call["claude_index"] = claude_index
                                 tool_call["started"] = True
 
-                                yield f"event: {Constants.EVENT_CONTENT_BLOCK_START}\ndata: {json.dumps({'type': Constants.EVENT_CONTENT_BLOCK_START, 'index': claude_index, 'content_block': {'type': Constants.CONTENT_TOOL_USE, 'id': tool_call['id'], 'name': tool_call['name'], 'input': {}}}, ensure_ascii=False)}\n\n"
+                                yield _sse(_SSE_CONTENT_BLOCK_START, {'type': Constants.EVENT_CONTENT_BLOCK_START, 'index': claude_index, 'content_block': {'type': Constants.CONTENT_TOOL_USE, 'id': tool_call['id'], 'name': tool_call['name'], 'input': {}}})
 
                             if "arguments" in function_data and tool_call["started"] and function_data["arguments"] is not None:
                                 tool_call["args_buffer"] += function_data["arguments"]
 
-                                try:
-                                    json.loads(tool_call["args_buffer"])
-                                    if not tool_call["json_sent"]:
-                                        yield f"event: {Constants.EVENT_CONTENT_BLOCK_DELTA}\ndata: {json.dumps({'type': Constants.EVENT_CONTENT_BLOCK_DELTA, 'index': tool_call['claude_index'], 'delta': {'type': Constants.DELTA_INPUT_JSON, 'partial_json': tool_call['args_buffer']}}, ensure_ascii=False)}\n\n"
+                                if not tool_call["json_sent"] and tool_call["args_buffer"].rstrip().endswith("}"):
+                                    try:
+                                        orjson.loads(tool_call["args_buffer"])
+                                        yield _sse(_SSE_CONTENT_BLOCK_DELTA, {'type': Constants.EVENT_CONTENT_BLOCK_DELTA, 'index': tool_call['claude_index'], 'delta': {'type': Constants.DELTA_INPUT_JSON, 'partial_json': tool_call['args_buffer']}})
                                         tool_call["json_sent"] = True
-                                except json.JSONDecodeError:
-                                    pass
+                                    except json.JSONDecodeError:
+                                        pass
 
                     # Handle finish reason
                     if finish_reason:
@@ -584,7 +685,7 @@ async def convert_lmp_v2_streaming_to_claude(
                             final_stop_reason = Constants.STOP_END_TURN
 
                 except json.JSONDecodeError as e:
-                    logger.warning(f"Failed to parse LMP V2 chunk: {chunk_data}, error: {e}")
+                    logger.warning(f"Failed to parse LMP V2 chunk: {chunk_data.decode(errors='replace')}, error: {e}")
                     continue
 
     except HTTPException as e:
@@ -597,28 +698,30 @@ async def convert_lmp_v2_streaming_to_claude(
                     "message": "Request was cancelled by client",
                 },
             }
-            yield f"event: error\ndata: {json.dumps(error_event, ensure_ascii=False)}\n\n"
+            yield _sse(_SSE_ERROR, error_event)
             return
         else:
             raise
     except Exception as e:
         logger.error(f"Streaming error: {e}")
-        import traceback
-
         logger.error(traceback.format_exc())
         error_event = {
             "type": "error",
             "error": {"type": "api_error", "message": f"Streaming error: {str(e)}"},
         }
-        yield f"event: error\ndata: {json.dumps(error_event, ensure_ascii=False)}\n\n"
+        yield _sse(_SSE_ERROR, error_event)
         return
+    finally:
+        # Close the upstream stream however this generator ends, including being closed
+        # early by the response, so the connection and its concurrency slot are released now
+        await openai_stream.aclose()
 
     # Send final SSE events
-    yield f"event: {Constants.EVENT_CONTENT_BLOCK_STOP}\ndata: {json.dumps({'type': Constants.EVENT_CONTENT_BLOCK_STOP, 'index': text_block_index}, ensure_ascii=False)}\n\n"
+    yield _sse(_SSE_CONTENT_BLOCK_STOP, {'type': Constants.EVENT_CONTENT_BLOCK_STOP, 'index': text_block_index})
 
     for tool_data in current_tool_calls.values():
         if tool_data.get("started") and tool_data.get("claude_index") is not None:
-            yield f"event: {Constants.EVENT_CONTENT_BLOCK_STOP}\ndata: {json.dumps({'type': Constants.EVENT_CONTENT_BLOCK_STOP, 'index': tool_data['claude_index']}, ensure_ascii=False)}\n\n"
+            yield _sse(_SSE_CONTENT_BLOCK_STOP, {'type': Constants.EVENT_CONTENT_BLOCK_STOP, 'index': tool_data['claude_index']})
 
-    yield f"event: {Constants.EVENT_MESSAGE_DELTA}\ndata: {json.dumps({'type': Constants.EVENT_MESSAGE_DELTA, 'delta': {'stop_reason': final_stop_reason, 'stop_sequence': None}, 'usage': usage_data, 'lmp_metadata': lmp_metadata if lmp_metadata else {}}, ensure_ascii=False)}\n\n"
-    yield f"event: {Constants.EVENT_MESSAGE_STOP}\ndata: {json.dumps({'type': Constants.EVENT_MESSAGE_STOP}, ensure_ascii=False)}\n\n"
+    yield _sse(_SSE_MESSAGE_DELTA, {'type': Constants.EVENT_MESSAGE_DELTA, 'delta': {'stop_reason': final_stop_reason, 'stop_sequence': None}, 'usage': usage_data, 'lmp_metadata': lmp_metadata if lmp_metadata else {}})
+    yield _sse(_SSE_MESSAGE_STOP, {'type': Constants.EVENT_MESSAGE_STOP})
@@ -1,26 +1,131 @@
 import asyncio
+import contextlib
+import functools
 import json
+import orjson
 from fastapi import HTTPException
-from typing import Optional, AsyncGenerator, Dict, Any
+from typing import Optional, AsyncGenerator, AsyncIterator, Dict, Any
 import httpx
 import logging
-from openai import AsyncOpenAI, AsyncAzureOpenAI
-from openai.types.chat import ChatCompletion, ChatCompletionChunk
-from openai._exceptions import APIError, RateLimitError, AuthenticationError, BadRequestError
+import re
+from weakref import WeakValueDictionary
+from openai import AsyncOpenAI
+from openai._exceptions import APIError, APIConnectionError, APITimeoutError, RateLimitError, AuthenticationError, BadRequestError
 
 logger = logging.getLogger(__name__)
 
+
+def _pretty_json(obj: Any) -> str:
+    """Indented JSON for the request/response log lines, rendered with orjson."""
+    try:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_INDENT_2).decode()
+    except TypeError:
+        return json.dumps(obj, default=str, indent=2, ensure_ascii=False)
+
+
+def _dumps_body(obj: Any) -> bytes:
+    """Encode an upstream request body with orjson, or the stdlib for ints wider than 64 bits."""
+    try:
+        return orjson.dumps(obj)
+    except TypeError:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+async def _iter_byte_lines(chunks: AsyncIterator[bytes]) -> AsyncGenerator[bytes, None]:
+    """Split a raw byte stream into non-blank lines without decoding it to str."""
+    # Lines are sliced straight out of an immutable buffer, so each is copied only once;
+    # only the unfinished tail is carried over into the next chunk
+    buffer = b""
+    async for data in chunks:
+        buffer = buffer + data if buffer else bytes(data)
+        start = 0
+        while (end := buffer.find(b"\n", start)) != -1:
+            line = buffer[start:end].rstrip(b"\r")
+            start = end + 1
+            if line and not line.isspace():
+                yield line
+        buffer = buffer[start:]
+    line = buffer.rstrip(b"\r")
+    if line and not line.isspace():
+        yield line
+
+# Error guidance checked in order against the lowercased error text; the first match wins
+_LMP_ERROR_PATTERNS = (
+    (re.compile(r"300001|鉴权失败"), "Authentication failed. Please check your API key configuration."),
+    (re.compile(r"300002|权限被拒绝"), "Permission denied. Your API key does not have access to this resource."),
+    (re.compile(r"20000[1-5]"), "Invalid request parameters. Please check your request format."),
+    (re.compile(r"40000[12]"), "Server error. Please try again later."),
+)
+_ERROR_PATTERNS = (
+    (re.compile(r"unsupported_country_region_territory|country, region, or territory not supported"),
+     "OpenAI API is not available in your region. Consider using a VPN or Azure OpenAI service."),
+    (re.compile(r"invalid_api_key|unauthorized"), "Invalid API key. Please check your OPENAI_API_KEY configuration."),
+    (re.compile(r"rate_limit|quota"), "Rate limit exceeded. Please wait and try again, or upgrade your API plan."),
+    (re.compile(r"^(?=.*model)(?=.*(?:not found|does not exist))", re.DOTALL),
+     "Model not found. Please check your BIG_MODEL and SMALL_MODEL configuration."),
+    (re.compile(r"billing|payment"), "Billing issue. Please check your OpenAI account billing status."),
+)
+
+
+# Error storms repeat the same few messages, so remember the outcome per message
+@functools.lru_cache(maxsize=256)
+def _classify_error(error_str_lower: str, provider: str) -> Optional[str]:
+    """Return the guidance for an error message, or None when no pattern matches."""
+    patterns = _LMP_ERROR_PATTERNS + _ERROR_PATTERNS if provider == "lmp" else _ERROR_PATTERNS
+    for pattern, message in patterns:
+        if pattern.search(error_str_lower):
+            return message
+    return None
+
+
 class OpenAIClient:
     """Async OpenAI client with cancellation support."""
     
-    def __init__(self, api_key: str, base_url: str, timeout: int = 90, api_version: Optional[str] = None, custom_headers: Optional[Dict[str, str]] = None, api_provider: str = "openai", lmp_api_version: str = ""):
+    def __init__(self, api_key: str, base_url: str, timeout: int = 90, api_version: Optional[str] = None, custom_headers: Optional[Dict[str, str]] = None, api_provider: str = "openai", lmp_api_version: str = "", max_connections: int = 100, max_keepalive_connections: int = 20, keepalive_expiry: float = 15.0, http2: bool = True, max_upstream_concurrency: int = 64, connect_timeout: float = 5.0, write_timeout: float = 30.0, pool_timeout: float = 5.0):
         self.api_key = api_key
         self.base_url = base_url
         self.custom_headers = custom_headers or {}
         self.api_provider = api_provider
         self.lmp_api_version = lmp_api_version
+        # LMP endpoint and headers are fixed for the client's lifetime, so build them once
+        self._is_v2 = lmp_api_version == "V2"
+        self._lmp_url = f"{base_url.rstrip('/')}/lmp-cloud-ias-server/api/llm/chat/completions" + ("/V2" if self._is_v2 else "")
+        self._lmp_headers = {
+            "Content-Type": "application/json",
+            "Authorization": api_key,  # LMP uses APP_KEY directly
+            **self.custom_headers
+        }
+        self._lmp_headers_log = _pretty_json({k: v if k.lower() != 'authorization' else '***HIDDEN***' for k, v in self._lmp_headers.items()})
         self.client = None  # Will be set to None for LMP mode
-        self.active_requests: Dict[str, asyncio.Event] = {}
+        # Task running each in-flight request, so cancel_request() can cancel it directly.
+        # Held weakly: an entry a cleanup path missed goes away with its task instead of leaking
+        self.active_requests: "WeakValueDictionary[str, asyncio.Task]" = WeakValueDictionary()
+        # Caps concurrent upstream calls; callers beyond the limit queue here instead of
+        # piling onto the upstream and getting rate limited
+        self.max_upstream_concurrency = max_upstream_concurrency
+        # Created on first use by _upstream_slot, inside the running event loop
+        self._upstream_semaphore: Optional[asyncio.Semaphore] = None
+        self._upstream_in_flight = 0
+
+        # Shared HTTP/2 connection pool reused by every upstream call (OpenAI SDK and LMP),
+        # created on first use by _get_http_client
+        self._http_client: Optional[httpx.AsyncClient] = None
+        if http2:
+            # httpx needs the optional h2 package for HTTP/2; stay on HTTP/1.1 without it
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("h2 package not installed, using HTTP/1.1 for upstream connections")
+                http2 = False
+        self._http2 = http2
+        # `timeout` bounds reads; connecting, writing and waiting for a pooled connection
+        # fail sooner so a dead upstream is noticed quickly
+        self._timeout = httpx.Timeout(timeout, connect=connect_timeout, write=write_timeout, pool=pool_timeout)
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
 
         # Only create OpenAI client if NOT in LMP mode
         if api_provider != "lmp":
@@ -35,28 +140,74 @@ class OpenAIClient:
 
             # Detect if using Azure and instantiate the appropriate client
             if api_version:
+                # Only Azure deployments need the Azure client, so import it here
+                from openai import AsyncAzureOpenAI
+
                 self.client = AsyncAzureOpenAI(
                     api_key=api_key,
                     azure_endpoint=base_url,
                     api_version=api_version,
-                    timeout=timeout,
-                    default_headers=all_headers
+                    timeout=self._timeout,
+                    default_headers=all_headers,
+                    http_client=self._get_http_client(),
                 )
             else:
                 self.client = AsyncOpenAI(
                     api_key=api_key,
                     base_url=base_url,
-                    timeout=timeout,
-                    default_headers=all_headers
+                    timeout=self._timeout,
+                    default_headers=all_headers,
+                    http_client=self._get_http_client(),
                 )
 
-    def _get_lmp_endpoint(self) -> str:
-        """Get the LMP endpoint path based on API version."""
-        base_path = "/lmp-cloud-ias-server/api/llm/chat/completions"
-        if self.lmp_api_version == "V2":
-            return f"{base_path}/V2"
-        return base_path
-    
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Return the shared connection pool, creating it on first use."""
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                http2=self._http2,
+                timeout=self._timeout,
+                limits=self._limits,
+                headers={"Content-Type": "application/json", **self.custom_headers},
+            )
+        return self._http_client
+
+    @contextlib.asynccontextmanager
+    async def _upstream_slot(self):
+        """Hold one upstream concurrency slot for the duration of the block."""
+        # Before Python 3.10 a semaphore binds to the loop current at creation, which at
+        # import time is not the loop the server ends up running
+        if self._upstream_semaphore is None:
+            self._upstream_semaphore = asyncio.Semaphore(self.max_upstream_concurrency)
+        async with self._upstream_semaphore:
+            self._upstream_in_flight += 1
+            try:
+                yield
+            finally:
+                self._upstream_in_flight -= 1
+
+    async def warm_up(self):
+        """Open a connection to the upstream so the first request skips the TCP/TLS handshake."""
+        try:
+            # Warm-up is only an optimisation: an upstream that accepts the connection and
+            # then stalls must not hold up startup for the full read timeout
+            response = await self._get_http_client().head(self.base_url, timeout=httpx.Timeout(self._timeout.connect))
+            # Servers without h2 in ALPN (or plain http URLs) are served over HTTP/1.1
+            logger.info(f"🔥 Upstream connection pool warmed up: {self.base_url} ({response.http_version})")
+        except httpx.HTTPError as e:
+            logger.warning(f"Upstream warm-up failed (will connect on first request): {type(e).__name__}: {e}")
+
+    def upstream_stats(self) -> Dict[str, int]:
+        """Concurrency limit and upstream calls currently holding a slot."""
+        return {
+            "max_concurrency": self.max_upstream_concurrency,
+            "in_flight": self._upstream_in_flight,
+        }
+
+    async def aclose(self):
+        """Close the shared connection pool."""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+
     async def create_chat_completion(self, request: Dict[str, Any], request_id: Optional[str] = None) -> Dict[str, Any]:
         """Send chat completion to OpenAI API with cancellation support."""
 
@@ -64,159 +215,85 @@ class OpenAIClient:
         if self.api_provider == "lmp":
             return await self._lmp_chat_completion(request, request_id)
 
-        # Create cancellation token if request_id provided
+        # Register the calling task so cancel_request() can cancel it
         if request_id:
-            cancel_event = asyncio.Event()
-            self.active_requests[request_id] = cancel_event
+            self.active_requests[request_id] = asyncio.current_task()
 
         try:
             # Log OpenAI request (non-LMP mode)
             logger.info(f"📤 [UPSTREAM REQUEST] Sending to OpenAI-compatible API")
             logger.info(f"🌐 Base URL: {self.base_url}")
-            logger.info(f"📦 Upstream Request Body: {json.dumps(request, indent=2, ensure_ascii=False)}")
-
-            # Create task that can be cancelled
-            completion_task = asyncio.create_task(
-                self.client.chat.completions.create(**request)
-            )
-
-            if request_id:
-                # Wait for either completion or cancellation
-                cancel_task = asyncio.create_task(cancel_event.wait())
-                done, pending = await asyncio.wait(
-                    [completion_task, cancel_task],
-                    return_when=asyncio.FIRST_COMPLETED
-                )
+            logger.info(f"📦 Upstream Request Body: {_pretty_json(request)}")
 
-                # Cancel pending tasks
-                for task in pending:
-                    task.cancel()
-                    try:
-                        await task
-                    except asyncio.CancelledError:
-                        pass
-
-                # Check if request was cancelled
-                if cancel_task in done:
-                    completion_task.cancel()
-                    raise HTTPException(status_code=499, detail="Request cancelled by client")
-
-                completion = await completion_task
-            else:
-                completion = await completion_task
-
-            # Convert to dict format that matches the original interface
-            result = completion.model_dump()
+            # Decode the raw body straight into a dict: building a pydantic ChatCompletion
+            # only to model_dump() it again walks the whole response twice
+            async with self._upstream_slot():
+                response = await self.client.chat.completions.with_raw_response.create(**request)
+            result = orjson.loads(response.content)
             logger.info(f"✅ [UPSTREAM SUCCESS] OpenAI API returned response")
-            logger.info(f"📦 Upstream Response Body: {json.dumps(result, indent=2, ensure_ascii=False)}")
+            logger.info(f"📦 Upstream Response Body: {_pretty_json(result)}")
             return result
 
-        except AuthenticationError as e:
-            raise HTTPException(status_code=401, detail=self.classify_openai_error(str(e)))
-        except RateLimitError as e:
-            raise HTTPException(status_code=429, detail=self.classify_openai_error(str(e)))
-        except BadRequestError as e:
-            raise HTTPException(status_code=400, detail=self.classify_openai_error(str(e)))
-        except APIError as e:
-            status_code = getattr(e, 'status_code', 500)
-            raise HTTPException(status_code=status_code, detail=self.classify_openai_error(str(e)))
+        except asyncio.CancelledError:
+            self._raise_if_cancelled_by_client(request_id)
+            raise
+        except HTTPException:
+            raise
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+            raise self._map_openai_exc(e)
 
         finally:
             # Clean up active request tracking
-            if request_id and request_id in self.active_requests:
-                del self.active_requests[request_id]
+            if request_id:
+                self.active_requests.pop(request_id, None)
 
     async def _lmp_chat_completion(self, request: Dict[str, Any], request_id: Optional[str] = None) -> Dict[str, Any]:
         """Send LMP chat completion using direct HTTP request."""
-        # Build LMP endpoint URL
-        lmp_path = "/lmp-cloud-ias-server/api/llm/chat/completions"
-        if self.lmp_api_version == "V2":
-            lmp_path = f"{lmp_path}/V2"
-        url = f"{self.base_url.rstrip('/')}{lmp_path}"
-
-        # Prepare headers
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": self.api_key,  # LMP uses APP_KEY directly
-            **self.custom_headers
-        }
-
         # Log upstream request details
         logger.info(f"📤 [UPSTREAM REQUEST] Sending to LMP API")
-        logger.info(f"🌐 URL: {url}")
-        logger.info(f"📋 Upstream Headers: {json.dumps({k: v if k.lower() != 'authorization' else '***HIDDEN***' for k, v in headers.items()}, indent=2, ensure_ascii=False)}")
-        logger.info(f"📦 Upstream Request Body: {json.dumps(request, indent=2, ensure_ascii=False)}")
+        logger.info(f"🌐 URL: {self._lmp_url}")
+        logger.info(f"📋 Upstream Headers: {self._lmp_headers_log}")
+        logger.info(f"📦 Upstream Request Body: {_pretty_json(request)}")
 
-        # Create cancellation token if request_id provided
+        # Register the calling task so cancel_request() can cancel it
         if request_id:
-            cancel_event = asyncio.Event()
-            self.active_requests[request_id] = cancel_event
+            self.active_requests[request_id] = asyncio.current_task()
 
         try:
-            async with httpx.AsyncClient(timeout=90) as client:
-                if request_id:
-                    # Wait for either completion or cancellation
-                    async def make_request():
-                        response = await client.post(url, json=request, headers=headers)
-                        return response
-
-                    request_task = asyncio.create_task(make_request())
-                    cancel_task = asyncio.create_task(cancel_event.wait())
-
-                    done, pending = await asyncio.wait(
-                        [request_task, cancel_task],
-                        return_when=asyncio.FIRST_COMPLETED
-                    )
-
-                    for task in pending:
-                        task.cancel()
-                        try:
-                            await task
-                        except asyncio.CancelledError:
-                            pass
-
-                    if cancel_task in done:
-                        request_task.cancel()
-                        raise HTTPException(status_code=499, detail="Request cancelled by client")
-
-                    response = await request_task
-                else:
-                    response = await client.post(url, json=request, headers=headers)
-
-                if response.status_code != 200:
-                    logger.error(f"❌ [UPSTREAM ERROR] LMP API returned error status: {response.status_code}")
-                    try:
-                        error_data = response.json()
-                        logger.error(f"📦 Error Response Body: {json.dumps(error_data, indent=2, ensure_ascii=False)}")
-                    except:
-                        error_data = {}
-                        logger.error(f"📦 Error Response Text: {response.text}")
-                    # Check for LMP error format
-                    if "code" in error_data or isinstance(error_data, dict):
-                        raise HTTPException(status_code=response.status_code, detail=error_data)
-                    raise HTTPException(status_code=response.status_code, detail=response.text)
-
-                # Log successful response
-                response_data = response.json()
-                logger.info(f"✅ [UPSTREAM SUCCESS] LMP API returned status: {response.status_code}")
-                logger.info(f"📦 Upstream Response Body: {json.dumps(response_data, indent=2, ensure_ascii=False)}")
-                return response_data
-
-        except httpx.HTTPStatusError as e:
-            raise HTTPException(status_code=e.response.status_code, detail=self.classify_openai_error(e.response.text))
-        except httpx.RequestError as e:
-            raise HTTPException(status_code=500, detail=f"Request failed: {str(e)}")
+            async with self._upstream_slot():
+                response = await self._get_http_client().post(self._lmp_url, content=_dumps_body(request), headers=self._lmp_headers)
+
+            if response.status_code != 200:
+                logger.error(f"❌ [UPSTREAM ERROR] LMP API returned error status: {response.status_code}")
+                try:
+                    error_data = orjson.loads(response.content)
+                    logger.error(f"📦 Error Response Body: {_pretty_json(error_data)}")
+                except:
+                    error_data = {}
+                    logger.error(f"📦 Error Response Text: {response.text}")
+                # Check for LMP error format
+                if "code" in error_data or isinstance(error_data, dict):
+                    raise HTTPException(status_code=response.status_code, detail=error_data)
+                raise HTTPException(status_code=response.status_code, detail=response.text)
+
+            # Log successful response
+            response_data = orjson.loads(response.content)
+            logger.info(f"✅ [UPSTREAM SUCCESS] LMP API returned status: {response.status_code}")
+            logger.info(f"📦 Upstream Response Body: {_pretty_json(response_data)}")
+            return response_data
+
+        except asyncio.CancelledError:
+            self._raise_if_cancelled_by_client(request_id)
+            raise
         except HTTPException:
             raise
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+            raise self._map_openai_exc(e)
         finally:
-            if request_id and request_id in self.active_requests:
-                del self.active_requests[request_id]
+            if request_id:
+                self.active_requests.pop(request_id, None)
     
-    async def create_chat_completion_stream(self, request: Dict[str, Any], request_id: Optional[str] = None) -> AsyncGenerator[str, None]:
+    async def create_chat_completion_stream(self, request: Dict[str, Any], request_id: Optional[str] = None) -> AsyncGenerator[bytes, None]:
         """Send streaming chat completion to OpenAI API with cancellation support."""
 
         # For LMP mode, use direct HTTP request
@@ -225,10 +302,9 @@ class OpenAIClient:
                 yield chunk
             return
 
-        # Create cancellation token if request_id provided
+        # Register the calling task so cancel_request() can cancel it
         if request_id:
-            cancel_event = asyncio.Event()
-            self.active_requests[request_id] = cancel_event
+            self.active_requests[request_id] = asyncio.current_task()
 
         try:
             # Ensure stream is enabled
@@ -240,205 +316,176 @@ class OpenAIClient:
             # Create the streaming completion
             logger.info(f"📤 [UPSTREAM STREAMING REQUEST] Sending to OpenAI-compatible API")
             logger.info(f"🌐 Base URL: {self.base_url}")
-            logger.info(f"📦 Upstream Request Body: {json.dumps(request, indent=2, ensure_ascii=False)}")
+            logger.info(f"📦 Upstream Request Body: {_pretty_json(request)}")
             logger.info(f"🌊 [STREAMING] Starting to receive streaming chunks...")
 
-            streaming_completion = await self.client.chat.completions.create(**request)
-
-            chunk_count = 0
-            async for chunk in streaming_completion:
-                # Check for cancellation before yielding each chunk
-                if request_id and request_id in self.active_requests:
-                    if self.active_requests[request_id].is_set():
-                        raise HTTPException(status_code=499, detail="Request cancelled by client")
+            # Forward the upstream SSE lines as-is rather than parsing every chunk into a
+            # pydantic model and serialising it back to JSON; the converter parses them once.
+            # The concurrency slot is held until the stream ends, as the connection is busy till then
+            async with self._upstream_slot(), self.client.chat.completions.with_streaming_response.create(**request) as response:
+                chunk_count = 0
+                async for line in _iter_byte_lines(response.iter_bytes()):
 
-                chunk_count += 1
-                # Log every 50th chunk
-                if chunk_count % 50 == 0:
-                    logger.debug(f"🌊 [STREAMING] Received chunk #{chunk_count}")
+                    chunk_count += 1
+                    # Log every 50th chunk
+                    if chunk_count % 50 == 0:
+                        logger.debug(f"🌊 [STREAMING] Received chunk #{chunk_count}")
 
-                # Convert chunk to SSE format
-                chunk_dict = chunk.model_dump()
-                chunk_json = json.dumps(chunk_dict, ensure_ascii=False)
-                yield f"data: {chunk_json}"
+                    yield line
 
-            # Signal end of stream
+            # Signal end of stream (harmless if the upstream already sent it)
             logger.info(f"✅ [STREAMING COMPLETED] Total chunks received: {chunk_count}")
-            yield "data: [DONE]"
-
-        except AuthenticationError as e:
-            raise HTTPException(status_code=401, detail=self.classify_openai_error(str(e)))
-        except RateLimitError as e:
-            raise HTTPException(status_code=429, detail=self.classify_openai_error(str(e)))
-        except BadRequestError as e:
-            raise HTTPException(status_code=400, detail=self.classify_openai_error(str(e)))
-        except APIError as e:
-            status_code = getattr(e, 'status_code', 500)
-            raise HTTPException(status_code=status_code, detail=self.classify_openai_error(str(e)))
+            yield b"data: [DONE]"
+
+        except asyncio.CancelledError:
+            self._raise_if_cancelled_by_client(request_id)
+            raise
+        except HTTPException:
+            raise
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+            raise self._map_openai_exc(e)
 
         finally:
             # Clean up active request tracking
-            if request_id and request_id in self.active_requests:
-                del self.active_requests[request_id]
+            if request_id:
+                self.active_requests.pop(request_id, None)
 
-    async def _lmp_chat_completion_stream(self, request: Dict[str, Any], request_id: Optional[str] = None) -> AsyncGenerator[str, None]:
+    async def _lmp_chat_completion_stream(self, request: Dict[str, Any], request_id: Optional[str] = None) -> AsyncGenerator[bytes, None]:
         """Send LMP streaming chat completion using direct HTTP request."""
-        # Build LMP endpoint URL
-        lmp_path = "/lmp-cloud-ias-server/api/llm/chat/completions"
-        if self.lmp_api_version == "V2":
-            lmp_path = f"{lmp_path}/V2"
-        url = f"{self.base_url.rstrip('/')}{lmp_path}"
-
-        # Prepare headers
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": self.api_key,
-            **self.custom_headers
-        }
-
         # Ensure stream is enabled
         request["stream"] = True
 
         # Log upstream request details for streaming
         logger.info(f"📤 [UPSTREAM STREAMING REQUEST] Sending to LMP API")
-        logger.info(f"🌐 URL: {url}")
-        logger.info(f"📋 Upstream Headers: {json.dumps({k: v if k.lower() != 'authorization' else '***HIDDEN***' for k, v in headers.items()}, indent=2, ensure_ascii=False)}")
-        logger.info(f"📦 Upstream Request Body: {json.dumps(request, indent=2, ensure_ascii=False)}")
+        logger.info(f"🌐 URL: {self._lmp_url}")
+        logger.info(f"📋 Upstream Headers: {self._lmp_headers_log}")
+        logger.info(f"📦 Upstream Request Body: {_pretty_json(request)}")
         logger.info(f"🌊 [STREAMING] Starting to receive streaming chunks...")
 
-        # Create cancellation token if request_id provided
+        # Register the calling task so cancel_request() can cancel it
         if request_id:
-            cancel_event = asyncio.Event()
-            self.active_requests[request_id] = cancel_event
+            self.active_requests[request_id] = asyncio.current_task()
 
         try:
-            async with httpx.AsyncClient(timeout=90) as client:
-                async def make_request():
-                    return client.stream("POST", url, json=request, headers=headers)
-
-                if request_id:
-                    request_task = asyncio.create_task(make_request())
-                    cancel_task = asyncio.create_task(cancel_event.wait())
-
-                    done, pending = await asyncio.wait(
-                        [request_task, cancel_task],
-                        return_when=asyncio.FIRST_COMPLETED
-                    )
-
-                    for task in pending:
-                        task.cancel()
-                        try:
-                            await task
-                        except asyncio.CancelledError:
-                            pass
-
-                    if cancel_task in done:
-                        request_task.cancel()
-                        raise HTTPException(status_code=499, detail="Request cancelled by client")
-
-                    response = await request_task
-                else:
-                    response = await make_request()
-
-                if response.status_code != 200:
-                    content = await response.aread()
-                    logger.error(f"❌ [UPSTREAM STREAMING ERROR] LMP API returned error status: {response.status_code}")
-                    logger.error(f"📦 Error Response: {content.decode()}")
-                    raise HTTPException(status_code=response.status_code, detail=content.decode())
-
-                logger.info(f"✅ [STREAMING STARTED] Connection established, receiving chunks...")
-
-                # Process streaming response
-                is_v2 = self.lmp_api_version == "V2"
-                chunk_count = 0
-                async for line in response.aiter_lines():
-                    if not line.strip():
-                        continue
-
-                    # Check for cancellation
-                    if request_id and request_id in self.active_requests:
-                        if self.active_requests[request_id].is_set():
-                            raise HTTPException(status_code=499, detail="Request cancelled by client")
-
-                    chunk_count += 1
-                    # Log every 50th chunk to avoid spam
-                    if chunk_count % 50 == 0:
-                        logger.debug(f"🌊 [STREAMING] Received chunk #{chunk_count}: {line[:100]}...")
-
-                    # V2 format: no "data:" prefix, just raw JSON
-                    # V1 format: standard SSE with "data:" prefix
-                    if is_v2:
-                        yield line
-                    else:
-                        # For V1, ensure data: prefix exists
-                        if line.startswith("data:"):
+            client = self._get_http_client()
+            upstream_request = client.build_request("POST", self._lmp_url, content=_dumps_body(request), headers=self._lmp_headers)
+            # Hold the concurrency slot until the stream ends: the connection is busy till then
+            async with self._upstream_slot():
+                response = await client.send(upstream_request, stream=True)
+
+                try:
+                    if response.status_code != 200:
+                        content = await response.aread()
+                        logger.error(f"❌ [UPSTREAM STREAMING ERROR] LMP API returned error status: {response.status_code}")
+                        logger.error(f"📦 Error Response: {content.decode()}")
+                        raise HTTPException(status_code=response.status_code, detail=content.decode())
+
+                    logger.info(f"✅ [STREAMING STARTED] Connection established, receiving chunks...")
+
+                    # Process streaming response
+                    is_v2 = self._is_v2
+                    chunk_count = 0
+                    async for line in _iter_byte_lines(response.aiter_bytes()):
+
+                        chunk_count += 1
+                        # Log every 50th chunk to avoid spam
+                        if chunk_count % 50 == 0:
+                            logger.debug(f"🌊 [STREAMING] Received chunk #{chunk_count}: {line[:100]}...")
+
+                        # V2 format: no "data:" prefix, just raw JSON
+                        # V1 format: standard SSE with "data:" prefix
+                        if is_v2:
                             yield line
                         else:
-                            yield f"data: {line}"
-
-                # Signal end of stream
-                logger.info(f"✅ [STREAMING COMPLETED] Total chunks received: {chunk_count}")
-                if is_v2:
-                    yield "[DONE]"
-                else:
-                    yield "data: [DONE]"
-
-        except httpx.HTTPStatusError as e:
-            raise HTTPException(status_code=e.response.status_code, detail=self.classify_openai_error(e.response.text))
-        except httpx.RequestError as e:
-            raise HTTPException(status_code=500, detail=f"Request failed: {str(e)}")
+                            # For V1, ensure data: prefix exists
+                            if line.startswith(b"data:"):
+                                yield line
+                            else:
+                                yield b"data: " + line
+
+                    # Signal end of stream
+                    logger.info(f"✅ [STREAMING COMPLETED] Total chunks received: {chunk_count}")
+                    if is_v2:
+                        yield b"[DONE]"
+                    else:
+                        yield b"data: [DONE]"
+                finally:
+                    await response.aclose()
+
+        except asyncio.CancelledError:
+            self._raise_if_cancelled_by_client(request_id)
+            raise
         except HTTPException:
             raise
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+            raise self._map_openai_exc(e)
         finally:
-            if request_id and request_id in self.active_requests:
-                del self.active_requests[request_id]
+            # Clean up active request tracking
+            if request_id:
+                self.active_requests.pop(request_id, None)
 
     def classify_openai_error(self, error_detail: Any) -> str:
         """Provide specific error guidance for common OpenAI API issues."""
-        error_str = str(error_detail).lower()
-
-        # LMP error codes
-        if self.api_provider == "lmp":
-            # Check for LMP error code patterns
-            if "300001" in error_str or "鉴权失败" in error_str:
-                return "Authentication failed. Please check your API key configuration."
-            if "300002" in error_str or "权限被拒绝" in error_str:
-                return "Permission denied. Your API key does not have access to this resource."
-            if any(code in error_str for code in ["200001", "200002", "200003", "200004", "200005"]):
-                return "Invalid request parameters. Please check your request format."
-            if "400001" in error_str or "400002" in error_str:
-                return "Server error. Please try again later."
-
-        # Region/country restrictions
-        if "unsupported_country_region_territory" in error_str or "country, region, or territory not supported" in error_str:
-            return "OpenAI API is not available in your region. Consider using a VPN or Azure OpenAI service."
-
-        # API key issues
-        if "invalid_api_key" in error_str or "unauthorized" in error_str:
-            return "Invalid API key. Please check your OPENAI_API_KEY configuration."
-
-        # Rate limiting
-        if "rate_limit" in error_str or "quota" in error_str:
-            return "Rate limit exceeded. Please wait and try again, or upgrade your API plan."
-
-        # Model not found
-        if "model" in error_str and ("not found" in error_str or "does not exist" in error_str):
-            return "Model not found. Please check your BIG_MODEL and SMALL_MODEL configuration."
-
-        # Billing issues
-        if "billing" in error_str or "payment" in error_str:
-            return "Billing issue. Please check your OpenAI account billing status."
-
+        error_str = str(error_detail)
         # Default: return original message
-        return str(error_detail)
+        return _classify_error(error_str.lower(), self.api_provider) or error_str
     
+    def _map_openai_exc(self, e: Exception) -> HTTPException:
+        """Translate an upstream client error (OpenAI SDK or httpx) into an HTTPException."""
+        # Timeouts and connection failures are expected during upstream incidents: log
+        # them without a traceback. The SDK's versions subclass APIError, so check first.
+        if isinstance(e, (APITimeoutError, httpx.TimeoutException)):
+            logger.warning(f"Upstream request timed out: {e}")
+            return HTTPException(status_code=504, detail=self.classify_openai_error(str(e)))
+        if isinstance(e, (APIConnectionError, httpx.RequestError)):
+            logger.warning(f"Upstream request failed: {e}")
+            return HTTPException(status_code=502, detail=self.classify_openai_error(str(e)))
+        if isinstance(e, AuthenticationError):
+            status_code = 401
+        elif isinstance(e, RateLimitError):
+            status_code = 429
+        elif isinstance(e, BadRequestError):
+            status_code = 400
+        elif isinstance(e, APIError):
+            status_code = getattr(e, 'status_code', 500)
+        elif isinstance(e, httpx.HTTPStatusError):
+            return HTTPException(status_code=e.response.status_code, detail=self.classify_openai_error(e.response.text))
+        else:
+            return HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+        return HTTPException(status_code=status_code, detail=self.classify_openai_error(str(e)))
+
     def cancel_request(self, request_id: str) -> bool:
         """Cancel an active request by request_id."""
-        if request_id in self.active_requests:
-            self.active_requests[request_id].set()
-            return True
-        return False
\ No newline at end of file
+        # Drop the entry first: that is how the cancelled task tells this apart from
+        # other cancellations (e.g. shutdown) in _raise_if_cancelled_by_client
+        task = self.active_requests.pop(request_id, None)
+        if task is None:
+            return False
+        task.cancel()
+        return True
+
+    @contextlib.asynccontextmanager
+    async def track_request(self, request_id: str):
+        """Make cancel_request(request_id) cancel the current task while in the block.
+
+        For work that awaits upstream calls made on another task's behalf, such as a
+        coalesced request; the cancellation comes out as a 499 HTTPException.
+        """
+        self.active_requests[request_id] = asyncio.current_task()
+        try:
+            yield
+        except asyncio.CancelledError:
+            self._raise_if_cancelled_by_client(request_id)
+            raise
+        finally:
+            self.active_requests.pop(request_id, None)
+
+    def _raise_if_cancelled_by_client(self, request_id: Optional[str]):
+        """Turn a cancellation from cancel_request() into a 499 HTTPException."""
+        if request_id and request_id not in self.active_requests:
+            # The cancellation is handled here, so don't leave the task marked as cancelling.
+            # Task.uncancel() only exists on Python 3.11+; older versions keep no such count.
+            task = asyncio.current_task()
+            if hasattr(task, "uncancel"):
+                task.uncancel()
+            raise HTTPException(status_code=499, detail="Request cancelled by client")
\ No newline at end of file
@@ -1,3 +1,4 @@
+import hmac
 import os
 import sys
 from dotenv import load_dotenv
@@ -23,13 +24,28 @@ class Config:
         self.azure_api_version = os.environ.get("AZURE_API_VERSION")  # For Azure OpenAI
         self.host = os.environ.get("HOST", "0.0.0.0")
         self.port = int(os.environ.get("PORT", "8082"))
+        self.keep_alive_timeout = int(os.environ.get("KEEP_ALIVE_TIMEOUT", "75"))
+        self.backlog = int(os.environ.get("BACKLOG", "2048"))
         self.log_level = os.environ.get("LOG_LEVEL", "INFO")
         self.max_tokens_limit = int(os.environ.get("MAX_TOKENS_LIMIT", "4096"))
         self.min_tokens_limit = int(os.environ.get("MIN_TOKENS_LIMIT", "100"))
         
         # Connection settings
         self.request_timeout = int(os.environ.get("REQUEST_TIMEOUT", "90"))
+        self.connect_timeout = float(os.environ.get("CONNECT_TIMEOUT", "5"))
+        self.write_timeout = float(os.environ.get("WRITE_TIMEOUT", "30"))
+        self.pool_timeout = float(os.environ.get("POOL_TIMEOUT", "5"))
         self.max_retries = int(os.environ.get("MAX_RETRIES", "2"))
+        self.max_connections = int(os.environ.get("MAX_CONNECTIONS", "100"))
+        self.max_keepalive_connections = int(os.environ.get("MAX_KEEPALIVE_CONNECTIONS", "20"))
+        self.keepalive_expiry = float(os.environ.get("KEEPALIVE_EXPIRY", "15"))
+        self.http2_enabled = os.environ.get("HTTP2_ENABLED", "true").lower() == "true"
+        self.max_upstream_concurrency = int(os.environ.get("MAX_UPSTREAM_CONCURRENCY", "64"))
+
+        # In-process cache for deterministic (temperature 0) non-streaming responses
+        self.response_cache_enabled = os.environ.get("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+        self.response_cache_ttl = int(os.environ.get("RESPONSE_CACHE_TTL", "1800"))
+        self.response_cache_max_size = int(os.environ.get("RESPONSE_CACHE_MAX_SIZE", "1000"))
         
         # Model settings - BIG and SMALL models
         self.big_model = os.environ.get("BIG_MODEL", "gpt-4o")
@@ -70,8 +86,8 @@ class Config:
         if not self.anthropic_api_key:
             return True
             
-        # Check if the client's API key matches the expected value
-        return client_api_key == self.anthropic_api_key
+        # Check if the client's API key matches the expected value (constant-time)
+        return hmac.compare_digest(client_api_key.encode(), self.anthropic_api_key.encode())
     
     def get_custom_headers(self):
         """Get custom headers from environment variables"""
@@ -0,0 +1,47 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class _InFlight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class RequestCoalescer:
+    """Share one upstream call between identical requests that are in flight together.
+
+    Unlike ResponseCache this keeps nothing once the call finishes: callers that
+    arrive while a call for the same key is running simply await its result.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, _InFlight] = {}
+        self.coalesced = 0
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Await the in-flight call for key, starting it with factory() if there is none."""
+        entry = self._inflight.get(key)
+        if entry is None:
+            entry = _InFlight(asyncio.create_task(factory()))
+            self._inflight[key] = entry
+            entry.task.add_done_callback(lambda _: self._forget(key, entry))
+        else:
+            self.coalesced += 1
+
+        entry.waiters += 1
+        try:
+            # Shield so one caller being cancelled does not cancel the others' result
+            return await asyncio.shield(entry.task)
+        finally:
+            entry.waiters -= 1
+            if entry.waiters == 0 and not entry.task.done():
+                # Every caller is gone; stop the upstream call
+                self._forget(key, entry)
+                entry.task.cancel()
+
+    def _forget(self, key: str, entry: _InFlight):
+        if self._inflight.get(key) is entry:
+            del self._inflight[key]
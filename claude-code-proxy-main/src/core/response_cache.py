@@ -0,0 +1,78 @@
+import copy
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+
+# Transport-only request fields that must not split the cache
+_KEY_EXCLUDED_FIELDS = frozenset(("stream", "stream_options", "user"))
+
+
+class ResponseCache:
+    """In-process LRU cache with TTL for deterministic (temperature=0) or opted-in completions.
+
+    Methods never await, so each call is atomic on the event loop and needs no lock.
+    """
+
+    def __init__(self, max_size: int = 1000, ttl: float = 1800):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def is_cacheable(openai_request: Dict[str, Any], opt_in: bool = False) -> bool:
+        """Cache non-streaming requests that are deterministic (temperature 0) or opted in."""
+        if openai_request.get("stream"):
+            return False
+        return opt_in or openai_request.get("temperature", 1) == 0
+
+    @staticmethod
+    def is_storable(claude_response: Dict[str, Any]) -> bool:
+        """Tool calls drive client-side actions, so never replay them from the cache."""
+        return not any(block.get("type") == "tool_use" for block in claude_response.get("content", ()))
+
+    @staticmethod
+    def make_key(model: str, openai_request: Dict[str, Any]) -> str:
+        """Hash the client model and upstream request into a compact cache key."""
+        fields = {k: v for k, v in openai_request.items() if k not in _KEY_EXCLUDED_FIELDS}
+        try:
+            payload = orjson.dumps((model, fields), option=orjson.OPT_SORT_KEYS)
+        except TypeError:
+            # Ints wider than 64 bits; such requests just get keys in the stdlib format
+            payload = json.dumps((model, fields), sort_keys=True).encode()
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached response for key, or None on miss or expiry.
+
+        Each hit is a separate message, so it gets its own id.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                response = copy.deepcopy(value)
+                response["id"] = f"msg_{os.urandom(16).hex()}"
+                return response
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """Store a copy of a response, evicting the least recently used entries when full."""
+        self._entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size, for the health endpoint."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
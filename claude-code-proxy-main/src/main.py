@@ -1,5 +1,6 @@
 from fastapi import FastAPI
-from src.api.endpoints import router as api_router
+from src.api.endpoints import router as api_router, lifespan
+from src.api.responses import ORJSONResponse
 import uvicorn
 import sys
 from dotenv import load_dotenv
@@ -8,7 +9,12 @@ from src.core.config import config
 # Load .env file
 load_dotenv()
 
-app = FastAPI(title="Claude-to-OpenAI API Proxy", version="1.0.0")
+app = FastAPI(
+    title="Claude-to-OpenAI API Proxy",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 app.include_router(api_router)
 
@@ -33,10 +39,23 @@ def main():
         print(f"  SMALL_MODEL - Model for haiku requests (default: gpt-4o-mini)")
         print(f"  HOST - Server host (default: 0.0.0.0)")
         print(f"  PORT - Server port (default: 8082)")
+        print(f"  KEEP_ALIVE_TIMEOUT - Client keep-alive timeout in seconds (default: 75)")
+        print(f"  BACKLOG - Listen socket backlog (default: 2048)")
         print(f"  LOG_LEVEL - Logging level (default: WARNING)")
         print(f"  MAX_TOKENS_LIMIT - Token limit (default: 4096)")
         print(f"  MIN_TOKENS_LIMIT - Minimum token limit (default: 100)")
-        print(f"  REQUEST_TIMEOUT - Request timeout in seconds (default: 90)")
+        print(f"  REQUEST_TIMEOUT - Upstream read timeout in seconds (default: 90)")
+        print(f"  CONNECT_TIMEOUT - Upstream connect timeout in seconds (default: 5)")
+        print(f"  WRITE_TIMEOUT - Upstream write timeout in seconds (default: 30)")
+        print(f"  POOL_TIMEOUT - Wait for a pooled connection in seconds (default: 5)")
+        print(f"  MAX_CONNECTIONS - Upstream connection pool size (default: 100)")
+        print(f"  MAX_KEEPALIVE_CONNECTIONS - Idle upstream connections kept open (default: 20)")
+        print(f"  KEEPALIVE_EXPIRY - Seconds an idle upstream connection is kept (default: 15)")
+        print(f"  HTTP2_ENABLED - Use HTTP/2 for upstream connections (default: true)")
+        print(f"  MAX_UPSTREAM_CONCURRENCY - Maximum concurrent upstream calls (default: 64)")
+        print(f"  RESPONSE_CACHE_ENABLED - Cache temperature 0 responses (default: true)")
+        print(f"  RESPONSE_CACHE_TTL - Cached response lifetime in seconds (default: 1800)")
+        print(f"  RESPONSE_CACHE_MAX_SIZE - Maximum cached responses (default: 1000)")
         print("")
         print("Model mapping:")
         print(f"  Claude haiku models -> {config.small_model}")
@@ -64,13 +83,17 @@ def main():
     if log_level not in valid_levels:
         log_level = 'info'
 
-    # Start server
+    # Start server; "auto" picks uvloop (a direct dependency off Windows) and httptools when installed
     uvicorn.run(
         "src.main:app",
         host=config.host,
         port=config.port,
         log_level=log_level,
         reload=False,
+        loop="auto",
+        http="auto",
+        backlog=config.backlog,
+        timeout_keep_alive=config.keep_alive_timeout,
     )
 
 
@@ -0,0 +1,114 @@
+"""Test classification of upstream errors into user guidance."""
+
+import httpx
+import pytest
+from openai import APIConnectionError, APITimeoutError
+
+from src.core.client import OpenAIClient
+
+
+REGION = "OpenAI API is not available in your region. Consider using a VPN or Azure OpenAI service."
+API_KEY = "Invalid API key. Please check your OPENAI_API_KEY configuration."
+RATE_LIMIT = "Rate limit exceeded. Please wait and try again, or upgrade your API plan."
+MODEL = "Model not found. Please check your BIG_MODEL and SMALL_MODEL configuration."
+BILLING = "Billing issue. Please check your OpenAI account billing status."
+LMP_AUTH = "Authentication failed. Please check your API key configuration."
+LMP_PERMISSION = "Permission denied. Your API key does not have access to this resource."
+LMP_PARAMS = "Invalid request parameters. Please check your request format."
+LMP_SERVER = "Server error. Please try again later."
+
+# Guidance shared by both providers
+COMMON_CASES = [
+    pytest.param("Error: unsupported_country_region_territory", REGION, id="region_code"),
+    pytest.param("Country, region, or territory not supported", REGION, id="region_text"),
+    pytest.param("invalid_api_key: Incorrect API key provided", API_KEY, id="invalid_api_key"),
+    pytest.param("401 Unauthorized", API_KEY, id="unauthorized"),
+    pytest.param("rate_limit_exceeded", RATE_LIMIT, id="rate_limit"),
+    pytest.param("You exceeded your current quota", RATE_LIMIT, id="quota"),
+    pytest.param("The model `gpt-x` does not exist", MODEL, id="model_does_not_exist"),
+    pytest.param("not found: model gpt-x", MODEL, id="model_not_found_any_order"),
+    pytest.param("Billing hard limit reached", BILLING, id="billing"),
+    pytest.param("Payment required", BILLING, id="payment"),
+    # Earlier patterns win when several match
+    pytest.param("unauthorized: quota exceeded", API_KEY, id="first_match_wins"),
+    pytest.param("Connection reset by peer", "Connection reset by peer", id="fallback_keeps_original"),
+    pytest.param("Resource not found", "Resource not found", id="not_found_without_model"),
+]
+
+# LMP error codes, which only apply to the lmp provider
+LMP_CASES = [
+    pytest.param("code 300001", LMP_AUTH, id="lmp_300001"),
+    pytest.param("鉴权失败", LMP_AUTH, id="lmp_auth_text"),
+    pytest.param("code 300002", LMP_PERMISSION, id="lmp_300002"),
+    pytest.param("权限被拒绝", LMP_PERMISSION, id="lmp_permission_text"),
+    pytest.param("code 200001", LMP_PARAMS, id="lmp_200001"),
+    pytest.param("code 200005", LMP_PARAMS, id="lmp_200005"),
+    pytest.param("code 400001", LMP_SERVER, id="lmp_400001"),
+    pytest.param("code 400002", LMP_SERVER, id="lmp_400002"),
+    # LMP codes are checked before the generic patterns
+    pytest.param("300001 unauthorized", LMP_AUTH, id="lmp_before_generic"),
+]
+
+
+def _client(provider):
+    return OpenAIClient(api_key="sk-test", base_url="http://127.0.0.1:1/v1", api_provider=provider)
+
+
+@pytest.fixture(scope="module")
+def openai_client():
+    return _client("openai")
+
+
+@pytest.fixture(scope="module")
+def lmp_client():
+    return _client("lmp")
+
+
+class TestClassifyOpenAIError:
+    """Test suite for OpenAIClient.classify_openai_error."""
+
+    @pytest.mark.parametrize("error,expected", COMMON_CASES)
+    def test_openai_provider(self, openai_client, error, expected):
+        """Generic patterns map to their guidance; anything else is returned unchanged."""
+        assert openai_client.classify_openai_error(error) == expected
+
+    @pytest.mark.parametrize("error,expected", COMMON_CASES + LMP_CASES)
+    def test_lmp_provider(self, lmp_client, error, expected):
+        """The lmp provider adds its error codes on top of the generic patterns."""
+        assert lmp_client.classify_openai_error(error) == expected
+
+    @pytest.mark.parametrize("error", ["code 300001", "code 200003", "code 400002"])
+    def test_lmp_codes_ignored_for_openai(self, openai_client, error):
+        """LMP error codes fall through to the original message for the openai provider."""
+        assert openai_client.classify_openai_error(error) == error
+
+    def test_non_string_detail(self, openai_client):
+        """Error details that are not strings are classified by their str() form."""
+        detail = {"error": {"code": "invalid_api_key"}}
+        assert openai_client.classify_openai_error(detail) == API_KEY
+
+
+_REQUEST = httpx.Request("POST", "http://127.0.0.1:1/v1/chat/completions")
+
+
+class TestMapOpenAIExc:
+    """Test suite for OpenAIClient._map_openai_exc."""
+
+    @pytest.mark.parametrize(
+        "error,status_code",
+        [
+            pytest.param(APITimeoutError(request=_REQUEST), 504, id="sdk_timeout"),
+            pytest.param(httpx.ReadTimeout("timed out", request=_REQUEST), 504, id="httpx_timeout"),
+            pytest.param(APIConnectionError(request=_REQUEST), 502, id="sdk_connection_error"),
+            pytest.param(httpx.ConnectError("connection refused", request=_REQUEST), 502, id="httpx_connect_error"),
+            pytest.param(
+                httpx.HTTPStatusError("boom", request=_REQUEST, response=httpx.Response(503, request=_REQUEST)),
+                503,
+                id="httpx_status_error",
+            ),
+            pytest.param(ValueError("boom"), 500, id="unexpected"),
+        ],
+    )
+    def test_status_codes(self, openai_client, error, status_code):
+        """Upstream timeouts map to 504 and connection failures to 502."""
+        assert openai_client._map_openai_exc(error).status_code == status_code
@@ -0,0 +1,34 @@
+"""Test splitting of raw upstream byte streams into lines."""
+
+import pytest
+
+from src.core.client import _iter_byte_lines
+
+
+async def _chunks(items):
+    for item in items:
+        yield item
+
+
+async def _collect(agen):
+    return [line async for line in agen]
+
+
+class TestIterByteLines:
+    """Test suite for _iter_byte_lines."""
+
+    @pytest.mark.parametrize(
+        "chunks,expected",
+        [
+            pytest.param([b"data: a\ndata: b\n"], [b"data: a", b"data: b"], id="one_chunk"),
+            pytest.param([b"da", b"ta: a\ndata:", b" b\n"], [b"data: a", b"data: b"], id="split_across_chunks"),
+            pytest.param([b"data: a\r\n\r\ndata: b\r", b"\n"], [b"data: a", b"data: b"], id="crlf"),
+            pytest.param([b"data: a\n", b"", b"data: b\n"], [b"data: a", b"data: b"], id="empty_chunk"),
+            pytest.param([b"data: a\n\n  \n", b"data: b"], [b"data: a", b"data: b"], id="trailing_line_without_newline"),
+            pytest.param([b"data: a\n", b"data: b\r"], [b"data: a", b"data: b"], id="trailing_line_with_cr"),
+            pytest.param([b"data: a\n", b"\r"], [b"data: a"], id="trailing_bare_cr"),
+        ],
+    )
+    async def test_lines(self, chunks, expected):
+        """Lines are split on newlines with the CR of CRLF removed and blank lines skipped."""
+        assert await _collect(_iter_byte_lines(_chunks(chunks))) == expected
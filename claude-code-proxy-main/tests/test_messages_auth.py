@@ -0,0 +1,50 @@
+"""Test client API key validation on /v1/messages."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api import endpoints
+from src.core.config import config
+from src.main import app
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Test client with client API key validation turned on."""
+    monkeypatch.setattr(config, "anthropic_api_key", "test-key")
+    monkeypatch.setitem(app.dependency_overrides, endpoints.validate_api_key, endpoints._validate_client_api_key)
+    return TestClient(app)
+
+
+class TestMessagesAuth:
+    """Test suite for API key validation ordering on /v1/messages."""
+
+    @pytest.mark.parametrize(
+        "body",
+        [
+            pytest.param(b"{not json", id="malformed_json"),
+            pytest.param(b'{"model": "claude-3-5-sonnet-20241022"}', id="invalid_request"),
+        ],
+    )
+    def test_unauthenticated_request_gets_401_before_body_validation(self, client, body):
+        """A bad body from an unauthenticated client is rejected with 401, not a 422 echoing it."""
+        response = client.post("/v1/messages", content=body, headers={"content-type": "application/json"})
+
+        assert response.status_code == 401
+
+    def test_authenticated_invalid_request_gets_422(self, client):
+        """Body validation still applies once the client is authenticated."""
+        response = client.post(
+            "/v1/messages",
+            content=b'{"model": "claude-3-5-sonnet-20241022"}',
+            headers={"content-type": "application/json", "x-api-key": "test-key"},
+        )
+
+        assert response.status_code == 422
+
+    def test_request_body_in_openapi_schema(self, client):
+        """The manually parsed body is still documented in the OpenAPI schema."""
+        operation = client.get("/openapi.json").json()["paths"]["/v1/messages"]["post"]
+
+        schema = operation["requestBody"]["content"]["application/json"]["schema"]
+        assert {"model", "max_tokens", "messages"} <= set(schema["required"])
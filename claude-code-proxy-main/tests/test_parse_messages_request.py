@@ -0,0 +1,73 @@
+"""Test parsing of /v1/messages request bodies."""
+
+import json
+
+import pytest
+from fastapi.exceptions import RequestValidationError
+
+from src.api.endpoints import parse_messages_request
+from src.core.client import _dumps_body
+from src.core.response_cache import ResponseCache
+
+WIDE = 100000000000000000000  # wider than 64 bits
+
+
+class _Request:
+    """Minimal stand-in for the Starlette request the dependency reads."""
+
+    def __init__(self, body: bytes):
+        self._body = body
+
+    async def body(self) -> bytes:
+        return self._body
+
+
+def _body(**extra) -> bytes:
+    return json.dumps(
+        {
+            "model": "claude-3-5-sonnet-20241022",
+            "max_tokens": 100,
+            "messages": [{"role": "user", "content": "hi"}],
+            **extra,
+        }
+    ).encode()
+
+
+class TestParseMessagesRequest:
+    """Test suite for parse_messages_request."""
+
+    async def test_parses_body(self):
+        """A regular body is validated into a ClaudeMessagesRequest."""
+        request = await parse_messages_request(_Request(_body(temperature=0.5)), None)
+
+        assert request.max_tokens == 100
+        assert request.temperature == 0.5
+
+    async def test_ints_wider_than_64_bits_are_kept_exactly(self):
+        """Wide ints in tool schemas and tool_use input are not turned into floats."""
+        tools = [{"name": "count", "input_schema": {"type": "object", "properties": {"n": {"type": "integer", "maximum": WIDE}}}}]
+        messages = [
+            {"role": "user", "content": "count"},
+            {"role": "assistant", "content": [{"type": "tool_use", "id": "t1", "name": "count", "input": {"n": -WIDE}}]},
+        ]
+
+        request = await parse_messages_request(_Request(_body(tools=tools, messages=messages)), None)
+
+        assert request.tools[0].input_schema["properties"]["n"]["maximum"] == WIDE
+        assert isinstance(request.tools[0].input_schema["properties"]["n"]["maximum"], int)
+        assert request.messages[1].content[0].input == {"n": -WIDE}
+
+    async def test_invalid_json(self):
+        """Malformed JSON is reported like FastAPI's own body parsing."""
+        with pytest.raises(RequestValidationError) as exc_info:
+            await parse_messages_request(_Request(b'{"model": '), None)
+
+        assert exc_info.value.errors()[0]["type"] == "json_invalid"
+        assert exc_info.value.errors()[0]["loc"][0] == "body"
+
+    def test_wide_ints_can_be_encoded_again(self):
+        """Upstream bodies and cache keys handle ints wider than 64 bits."""
+        openai_request = {"model": "gpt-4o", "tools": [{"function": {"parameters": {"maximum": WIDE}}}]}
+
+        assert json.loads(_dumps_body(openai_request)) == openai_request
+        assert ResponseCache.make_key("m", openai_request) != ResponseCache.make_key("m", {**openai_request, "model": "x"})
@@ -0,0 +1,129 @@
+"""Test coalescing of identical in-flight requests."""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from src.core.client import OpenAIClient
+from src.core.request_coalescer import RequestCoalescer
+
+
+class TestRequestCoalescer:
+    """Test suite for RequestCoalescer."""
+
+    async def test_concurrent_identical_requests_share_one_call(self):
+        """Callers arriving while a call is in flight reuse its result."""
+        coalescer = RequestCoalescer()
+        calls = 0
+
+        async def upstream():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"id": "msg_1"}
+
+        results = await asyncio.gather(*(coalescer.run("k", upstream) for _ in range(5)))
+
+        assert calls == 1
+        assert coalescer.coalesced == 4
+        assert all(result == {"id": "msg_1"} for result in results)
+
+    async def test_finished_calls_are_not_reused(self):
+        """Nothing is kept once the call completes; that is the response cache's job."""
+        coalescer = RequestCoalescer()
+        calls = 0
+
+        async def upstream():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        assert await coalescer.run("k", upstream) == 1
+        assert await coalescer.run("k", upstream) == 2
+
+    async def test_errors_reach_every_waiter(self):
+        """A failed upstream call raises in all coalesced callers."""
+        coalescer = RequestCoalescer()
+
+        async def upstream():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        results = await asyncio.gather(
+            coalescer.run("k", upstream), coalescer.run("k", upstream), return_exceptions=True
+        )
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    async def test_call_survives_until_last_waiter_is_cancelled(self):
+        """Cancelling one caller leaves the shared call running for the rest."""
+        coalescer = RequestCoalescer()
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def upstream():
+            started.set()
+            await release.wait()
+            return "done"
+
+        first = asyncio.create_task(coalescer.run("k", upstream))
+        second = asyncio.create_task(coalescer.run("k", upstream))
+        await started.wait()
+
+        first.cancel()
+        release.set()
+        assert await second == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    async def test_upstream_cancelled_when_all_waiters_leave(self):
+        """The shared call is cancelled once nobody is waiting for it."""
+        coalescer = RequestCoalescer()
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def upstream():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiter = asyncio.create_task(coalescer.run("k", upstream))
+        await started.wait()
+        waiter.cancel()
+
+        await asyncio.wait_for(cancelled.wait(), 1)
+        assert coalescer._inflight == {}
+
+    async def test_cancel_request_cancels_shared_call(self):
+        """Cancelling the only waiter's request_id cancels the shared upstream call."""
+        client = OpenAIClient(api_key="sk-test", base_url="http://127.0.0.1:1/v1")
+        coalescer = RequestCoalescer()
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def upstream():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        async def handler():
+            async with client.track_request("req-1"):
+                return await coalescer.run("k", upstream)
+
+        waiter = asyncio.create_task(handler())
+        await started.wait()
+        assert client.cancel_request("req-1")
+
+        with pytest.raises(HTTPException) as exc_info:
+            await waiter
+        assert exc_info.value.status_code == 499
+        await asyncio.wait_for(cancelled.wait(), 1)
+        assert coalescer._inflight == {}
+        assert "req-1" not in client.active_requests
@@ -0,0 +1,89 @@
+"""Test the in-process response cache."""
+
+from src.core.response_cache import ResponseCache
+
+
+class TestResponseCache:
+    """Test suite for ResponseCache."""
+
+    def test_only_deterministic_non_streaming_requests_are_cacheable(self):
+        """Caching is limited to temperature=0, non-streaming requests."""
+        assert ResponseCache.is_cacheable({"temperature": 0})
+        assert not ResponseCache.is_cacheable({"temperature": 0, "stream": True})
+        assert not ResponseCache.is_cacheable({"temperature": 0.7})
+        assert not ResponseCache.is_cacheable({})
+
+    def test_opt_in_allows_non_deterministic_requests(self):
+        """X-Proxy-Cache opt-in covers any temperature, but never streaming."""
+        assert ResponseCache.is_cacheable({"temperature": 0.7}, opt_in=True)
+        assert not ResponseCache.is_cacheable({"stream": True}, opt_in=True)
+
+    def test_tool_call_responses_are_not_stored(self):
+        """Responses that ask the client to run tools must not be replayed."""
+        assert ResponseCache.is_storable({"content": [{"type": "text", "text": "hi"}]})
+        assert not ResponseCache.is_storable(
+            {"content": [{"type": "text", "text": "hi"}, {"type": "tool_use", "id": "t1", "name": "bash", "input": {}}]}
+        )
+
+    def test_key_ignores_dict_ordering(self):
+        """Equivalent requests hash to the same key regardless of key order."""
+        key_a = ResponseCache.make_key("claude-3-5-sonnet", {"model": "gpt-4o", "temperature": 0})
+        key_b = ResponseCache.make_key("claude-3-5-sonnet", {"temperature": 0, "model": "gpt-4o"})
+        key_c = ResponseCache.make_key("claude-3-haiku", {"model": "gpt-4o", "temperature": 0})
+
+        assert key_a == key_b
+        assert key_a != key_c
+
+    def test_key_ignores_transport_fields(self):
+        """stream, stream_options and user do not change the response, so not the key."""
+        base = {"model": "gpt-4o", "temperature": 0}
+        key = ResponseCache.make_key("claude-3-5-sonnet", base)
+
+        assert key == ResponseCache.make_key(
+            "claude-3-5-sonnet", {**base, "stream": False, "stream_options": {"include_usage": True}, "user": "u1"}
+        )
+
+    def test_hit_and_miss_counters(self):
+        """get() returns stored values and tracks hits and misses."""
+        cache = ResponseCache()
+
+        assert cache.get("k") is None
+        cache.set("k", {"id": "msg_1", "content": "cached"})
+        assert cache.get("k")["content"] == "cached"
+        assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+    def test_expired_entries_are_dropped(self):
+        """Entries past their TTL are treated as misses and removed."""
+        cache = ResponseCache(ttl=-1)
+        cache.set("k", {"id": "msg_1"})
+
+        assert cache.get("k") is None
+        assert cache.stats()["size"] == 0
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """The oldest unused entry is evicted once max_size is exceeded."""
+        cache = ResponseCache(max_size=2)
+        cache.set("a", {"content": "a"})
+        cache.set("b", {"content": "b"})
+        cache.get("a")
+        cache.set("c", {"content": "c"})
+
+        assert cache.get("b") is None
+        assert cache.get("a")["content"] == "a"
+        assert cache.get("c")["content"] == "c"
+
+    def test_hits_are_independent_copies_with_fresh_ids(self):
+        """Mutating a stored or returned response does not leak into later hits."""
+        cache = ResponseCache()
+        response = {"id": "msg_1", "content": [{"type": "text", "text": "cached"}]}
+        cache.set("k", response)
+        response["content"][0]["text"] = "changed after set"
+
+        first = cache.get("k")
+        first["content"][0]["text"] = "changed after get"
+        second = cache.get("k")
+
+        assert second["content"] == [{"type": "text", "text": "cached"}]
+        assert first["id"] != second["id"]
+        assert "msg_1" not in (first["id"], second["id"])
+        assert second["id"].startswith("msg_")
@@ -0,0 +1,49 @@
+"""Test JSON rendering of proxy responses."""
+
+import json
+
+from src.api.responses import ORJSONResponse
+from src.conversion.response_converter import convert_openai_to_claude_response
+from src.models.claude import ClaudeMessagesRequest
+
+
+class TestORJSONResponse:
+    """Test suite for ORJSONResponse."""
+
+    def test_renders_with_orjson(self):
+        """Regular content is rendered compactly."""
+        assert ORJSONResponse({"a": [1, "é"]}).body == '{"a":[1,"é"]}'.encode()
+
+    def test_int_wider_than_64_bits_in_tool_arguments(self):
+        """Tool call arguments with huge ints are returned exactly instead of failing."""
+        request = ClaudeMessagesRequest(
+            model="claude-3-5-sonnet-20241022",
+            max_tokens=100,
+            messages=[{"role": "user", "content": "count"}],
+        )
+        openai_response = {
+            "id": "chatcmpl-1",
+            "choices": [
+                {
+                    "message": {
+                        "role": "assistant",
+                        "content": None,
+                        "tool_calls": [
+                            {
+                                "id": "call_1",
+                                "type": "function",
+                                "function": {"name": "count", "arguments": '{"n": 100000000000000000000}'},
+                            }
+                        ],
+                    },
+                    "finish_reason": "tool_calls",
+                }
+            ],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1},
+        }
+
+        claude_response = convert_openai_to_claude_response(openai_response, request)
+        body = json.loads(ORJSONResponse(claude_response).body)
+
+        tool_use = next(block for block in body["content"] if block["type"] == "tool_use")
+        assert tool_use["input"] == {"n": 100000000000000000000}
@@ -0,0 +1,72 @@
+"""Test SSE event batching for streaming responses."""
+
+import asyncio
+
+import pytest
+
+from src.conversion.response_converter import batch_sse_events
+
+
+async def _events(items, delay=0):
+    for item in items:
+        if delay:
+            await asyncio.sleep(delay)
+        yield item
+
+
+async def _collect(agen):
+    return [chunk async for chunk in agen]
+
+
+class TestBatchSSEEvents:
+    """Test suite for batch_sse_events."""
+
+    async def test_ready_events_are_coalesced(self):
+        """Events produced back-to-back are flushed as a single write."""
+        chunks = await _collect(batch_sse_events(_events(["event: a\n\n", "event: b\n\n", b"event: c\n\n"])))
+
+        assert chunks == [b"event: a\n\nevent: b\n\nevent: c\n\n"]
+
+    async def test_flush_on_max_bytes(self):
+        """The buffer is flushed as soon as it reaches max_bytes."""
+        chunks = await _collect(batch_sse_events(_events(["x" * 6, "y" * 6, "z" * 2]), max_bytes=10))
+
+        assert chunks == [b"x" * 6 + b"y" * 6, b"zz"]
+
+    async def test_flush_on_idle(self):
+        """Slow events are not held back longer than max_delay_ms."""
+        chunks = await _collect(batch_sse_events(_events(["a", "b"], delay=0.05), max_delay_ms=1))
+
+        assert chunks == [b"a", b"b"]
+
+    async def test_error_is_propagated_after_pending_events(self):
+        """Buffered events are flushed before an upstream error is re-raised."""
+
+        async def failing():
+            yield "event: a\n\n"
+            raise RuntimeError("boom")
+
+        received = []
+        with pytest.raises(RuntimeError, match="boom"):
+            async for chunk in batch_sse_events(failing()):
+                received.append(chunk)
+
+        assert received == [b"event: a\n\n"]
+
+    async def test_early_close_closes_wrapped_stream(self):
+        """Closing the batcher stops the producer and closes the wrapped generator."""
+        closed = asyncio.Event()
+
+        async def endless():
+            try:
+                while True:
+                    yield "event: a\n\n"
+                    await asyncio.sleep(0)
+            finally:
+                closed.set()
+
+        batcher = batch_sse_events(endless(), max_bytes=1)
+        assert await batcher.__anext__() == b"event: a\n\n"
+        await batcher.aclose()
+
+        assert closed.is_set()
@@ -0,0 +1,76 @@
+"""Test background loading of the tiktoken encoding used by count_tokens."""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from src.api import endpoints
+
+
+@pytest.fixture
+def fake_tiktoken(monkeypatch):
+    """Stand-in tiktoken whose get_encoding blocks until released and then fails or succeeds."""
+    state = SimpleNamespace(fail=True, calls=0, release=threading.Event())
+
+    def get_encoding(name):
+        state.calls += 1
+        state.release.wait(5)
+        if state.fail:
+            raise OSError("download failed")
+        return SimpleNamespace(encode_ordinary_batch=lambda parts: [[0] * len(part.split()) for part in parts])
+
+    monkeypatch.setattr(endpoints, "tiktoken", SimpleNamespace(get_encoding=get_encoding))
+    monkeypatch.setattr(endpoints, "_token_encoding", None)
+    monkeypatch.setattr(endpoints, "_token_encoding_load", None)
+    monkeypatch.setattr(endpoints, "_token_encoding_retry_at", 0.0)
+    yield state
+    state.release.set()
+
+
+def _count_request(text):
+    return endpoints.ClaudeTokenCountRequest(
+        model="claude-3-5-sonnet-20241022",
+        messages=[{"role": "user", "content": text}],
+    )
+
+
+class TestTokenEncoding:
+    """Test suite for the background tiktoken load."""
+
+    async def test_count_tokens_does_not_wait_for_load(self, fake_tiktoken):
+        """Concurrent requests get the estimate at once and share a single load."""
+        text = "one two three four five six seven eight"
+
+        results = await asyncio.gather(*(endpoints.count_tokens(_count_request(text)) for _ in range(10)))
+
+        assert results == [{"input_tokens": len(text) // 4}] * 10
+        await asyncio.sleep(0.05)
+        assert fake_tiktoken.calls == 1
+
+        fake_tiktoken.fail = False
+        fake_tiktoken.release.set()
+        await endpoints._token_encoding_load
+        assert await endpoints.count_tokens(_count_request(text)) == {"input_tokens": 8}
+
+    async def test_failure_is_retried_after_delay(self, fake_tiktoken, monkeypatch):
+        """A failed load is not remembered: it is started again once the delay passes."""
+        now = [1000.0]
+        monkeypatch.setattr(endpoints.time, "monotonic", lambda: now[0])
+        fake_tiktoken.release.set()
+
+        endpoints._start_token_encoding_load()
+        await endpoints._token_encoding_load
+        assert endpoints._token_encoding is None
+
+        endpoints._start_token_encoding_load()
+        assert endpoints._token_encoding_load.done()
+        assert fake_tiktoken.calls == 1
+
+        fake_tiktoken.fail = False
+        now[0] += endpoints._TOKEN_ENCODING_RETRY_SECONDS
+        endpoints._start_token_encoding_load()
+        await endpoints._token_encoding_load
+        assert endpoints._token_encoding is not None
+        assert fake_tiktoken.calls == 2
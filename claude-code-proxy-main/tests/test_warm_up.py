@@ -0,0 +1,33 @@
+"""Test the upstream connection pool warm-up."""
+
+import asyncio
+import time
+
+from src.core.client import OpenAIClient
+
+
+class TestWarmUp:
+    """Test suite for OpenAIClient.warm_up."""
+
+    async def test_stalled_upstream_does_not_block_for_read_timeout(self):
+        """An upstream that accepts the connection but never answers is given up on quickly."""
+        stalled = []
+
+        async def stall(reader, writer):
+            stalled.append(writer)
+            await reader.read()
+
+        server = await asyncio.start_server(stall, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        client = OpenAIClient(api_key="sk-test", base_url=f"http://127.0.0.1:{port}/v1", timeout=90, connect_timeout=0.2)
+        try:
+            started = time.perf_counter()
+            await client.warm_up()
+            assert time.perf_counter() - started < 5
+            assert stalled
+        finally:
+            await client.aclose()
+            for writer in stalled:
+                writer.close()
+            server.close()
+            await server.wait_closed()